@@ -28,5 +28,6 @@ setup(
     author_email='yanchuan@outlook.com',
     license='Apache License 2.0',
     packages=['uriutils'],
+    install_requires=['futures; python_version < "3"'],  # backport of concurrent.futures
     zip_safe=True,
 )
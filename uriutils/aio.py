@@ -0,0 +1,227 @@
+"""
+This module contains :mod:`asyncio` counterparts of the convenience functions in :mod:`uriutils.uriutils`, so that many URIs can be fetched concurrently on a single event loop.
+S3 and HTTP URIs are handled natively using :mod:`aiobotocore` and :mod:`aiohttp` (when installed), sharing one client per event loop.
+All other URIs are delegated to the synchronous functions on the event loop's default executor.
+
+This module requires Python 3.5+ and is not imported by :mod:`uriutils`.
+"""
+
+__all__ = ['uri_read_async', 'uri_exists_async', 'uri_copy_many_async', 'uri_download_many_async', 'close_async_sessions']
+
+import asyncio
+import functools
+from io import BytesIO, TextIOWrapper
+import os
+
+try: from isal import igzip as gzip  # ISA-L accelerated drop-in replacement for gzip
+except ImportError: import gzip
+
+try: import aiobotocore.session
+except ImportError: aiobotocore = None
+
+try: import aiohttp
+except ImportError: aiohttp = None
+
+from .storages import S3URI, HTTPURI, _urlparse
+from .uriutils import uri_read, uri_dump, uri_exists, _is_gzip_uri, _DEFAULT_TEXTIO_ARGS
+
+_S3_GET_STORAGE_ARGS = frozenset(['SSECustomerAlgorithm', 'SSECustomerKey', 'RequestPayer'])
+_HTTP_STORAGE_ARGS = frozenset(['params', 'headers', 'cookies', 'allow_redirects', 'method'])
+
+_SESSIONS = {}
+"""Maps each event loop to its shared S3 client and HTTP session."""
+
+
+def _loop_sessions():
+    # The sessions reference their loop, so a weak mapping would never drop them; instead, the sessions of loops that were closed without :func:`close_async_sessions` are dropped here.
+    for loop in [loop for loop in _SESSIONS if loop.is_closed()]: del _SESSIONS[loop]
+
+    return _SESSIONS.setdefault(asyncio.get_event_loop(), {})
+#end def
+
+
+async def _create_s3_client():
+    context = aiobotocore.session.get_session().create_client('s3')
+    return context, await context.__aenter__()
+#end def
+
+
+async def _get_s3_client():
+    # The client is created in a task that is shared right away, so that coroutines asking for it concurrently do not each create (and leak) their own.
+    sessions = _loop_sessions()
+    future = sessions.get('s3')
+    if future is None: future = sessions['s3'] = asyncio.ensure_future(_create_s3_client())
+
+    try: return (await asyncio.shield(future))[1]
+    except Exception:
+        if sessions.get('s3') is future and future.done() and not future.cancelled() and future.exception() is not None: del sessions['s3']  # retry on next use
+        raise
+    #end try
+#end def
+
+
+async def _get_http_session():
+    sessions = _loop_sessions()
+    if 'http' not in sessions:
+        sessions['http'] = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300))
+
+    return sessions['http']
+#end def
+
+
+async def close_async_sessions():
+    """Closes the S3 client and HTTP session shared by the current event loop."""
+
+    sessions = _SESSIONS.pop(asyncio.get_event_loop(), {})
+    if 's3' in sessions:
+        try: context, _ = await sessions['s3']
+        except Exception: context = None
+        if context is not None: await context.__aexit__(None, None, None)
+    #end if
+    if 'http' in sessions: await sessions['http'].close()
+#end def
+
+
+def _native_backend(o, storage_args):
+    """Returns ``'s3'`` or ``'http'`` if the parsed URI ``o`` can be handled natively with ``storage_args``, and ``None`` otherwise."""
+
+    if o.scheme in S3URI.SUPPORTED_SCHEMES and aiobotocore is not None and set(storage_args) <= _S3_GET_STORAGE_ARGS: return 's3'
+    if o.scheme in HTTPURI.SUPPORTED_SCHEMES and aiohttp is not None and set(storage_args) <= _HTTP_STORAGE_ARGS: return 'http'
+
+    return None
+#end def
+
+
+async def _run_in_executor(func, *args, **kwargs):
+    return await asyncio.get_event_loop().run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+async def uri_read_async(uri, mode='rb', auto_compress=True, textio_args=None, storage_args=None, **kwargs):
+    """
+    Asynchronous version of :func:`uriutils.uriutils.uri_read`.
+    See :func:`uriutils.uriutils.uri_open` for complete description of keyword parameters.
+
+    :returns: Contents of URI
+    :rtype: str, bytes
+    """
+
+    if storage_args is None: storage_args = {}
+
+    o = _urlparse(uri)
+    backend = _native_backend(o, storage_args)
+    if backend is None or mode not in ('rb', 'r'):
+        return await _run_in_executor(uri_read, uri, mode=mode, auto_compress=auto_compress, textio_args=textio_args, storage_args=storage_args, **kwargs)
+
+    if backend == 's3':
+        client = await _get_s3_client()
+        r = await client.get_object(Bucket=o.netloc, Key=o.path.lstrip('/'), **storage_args)
+        async with r['Body'] as stream:
+            content = await stream.read()
+    else:
+        session = await _get_http_session()
+        request_args = dict(storage_args)
+        method = request_args.pop('method', None) or 'GET'
+        async with session.request(method, uri, **request_args) as r:
+            r.raise_for_status()
+            content = await r.read()
+        #end with
+    #end if
+
+    if auto_compress and _is_gzip_uri(uri): content = gzip.decompress(content)
+
+    if mode == 'r':
+        if textio_args is None: textio_args = _DEFAULT_TEXTIO_ARGS
+        elif 'encoding' not in textio_args: textio_args = dict(textio_args, encoding='utf-8')
+
+        with TextIOWrapper(BytesIO(content), **textio_args) as f:
+            content = f.read()
+    #end if
+
+    return content
+#end def
+
+
+async def uri_exists_async(uri, storage_args=None):
+    """
+    Asynchronous version of :func:`uriutils.uriutils.uri_exists`.
+
+    :param str uri: URI to check existence
+    :param dict storage_args: Keyword arguments to pass to the underlying storage object
+    :returns: ``True`` if URI exists
+    :rtype: bool
+    """
+
+    if storage_args is None: storage_args = {}
+
+    o = _urlparse(uri)
+    backend = _native_backend(o, storage_args)
+    if backend is None: return await _run_in_executor(uri_exists, uri, storage_args=storage_args)
+
+    if backend == 's3':
+        client = await _get_s3_client()
+        try: await client.head_object(Bucket=o.netloc, Key=o.path.lstrip('/'), **storage_args)
+        except client.exceptions.ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'): return False
+            raise
+        #end try
+
+        return True
+    #end if
+
+    session = await _get_http_session()
+    async with session.head(uri) as r:
+        return r.status < 400
+#end def
+
+
+async def uri_copy_many_async(srcs, dsts, concurrency=16):
+    """
+    Copies the content of each URI in ``srcs`` to the corresponding URI in ``dsts``, with up to ``concurrency`` copies in flight at a time.
+    Content is copied as is, without compressing or decompressing gzip files.
+
+    :param list srcs: URIs to copy from
+    :param list dsts: URIs to copy to
+    :param int concurrency: Maximum number of concurrent copies
+    :raise: A :exc:`ValueError` if ``srcs`` and ``dsts`` have different lengths.
+    """
+
+    srcs, dsts = list(srcs), list(dsts)
+    if len(srcs) != len(dsts): raise ValueError('Cannot copy {} URIs to {} destinations.'.format(len(srcs), len(dsts)))
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _copy(src, dst):
+        async with semaphore:
+            content = await uri_read_async(src, mode='rb', auto_compress=False)
+            await _run_in_executor(uri_dump, dst, content, mode='wb', auto_compress=False)
+        #end with
+    #end def
+
+    await asyncio.gather(*[_copy(src, dst) for src, dst in zip(srcs, dsts)])
+#end def
+
+
+async def uri_download_many_async(uris, dest_dir, concurrency=16):
+    """
+    Downloads each URI in ``uris`` into the local directory ``dest_dir``, named after the last component of its path.
+
+    :param list uris: URIs to download
+    :param str dest_dir: Local directory to download into
+    :param int concurrency: Maximum number of concurrent downloads
+    :returns: Local paths of the downloaded files, in the same order as ``uris``
+    :rtype: list
+    :raise: A :exc:`ValueError` if a URI has no file name, or several URIs have the same one (so that they would overwrite each other).
+    """
+
+    names = [os.path.basename(_urlparse(uri).path.rstrip('/')) for uri in uris]
+    for uri, name in zip(uris, names):
+        if not name: raise ValueError('<{}> has no file name to download to.'.format(uri))
+
+    duplicates = sorted(set(name for name in names if names.count(name) > 1))
+    if duplicates: raise ValueError('Several URIs would be downloaded to the same file: {}.'.format(', '.join(duplicates)))
+
+    dsts = [os.path.join(dest_dir, name) for name in names]
+    await uri_copy_many_async(uris, dsts, concurrency=concurrency)
+
+    return dsts
+#end def
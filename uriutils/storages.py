@@ -4,39 +4,538 @@ This module defines all the storage systems supported by uriutils.
 
 __all__ = ['STORAGES', 'URIBytesOutput', 'BaseURI']
 
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from io import BufferedIOBase, BytesIO, FileIO, RawIOBase
 import os
 import shutil
+import stat
+import sys
+import threading
+import time
 import warnings
+import weakref
+
+try: import queue  # Python 3
+except ImportError: import Queue as queue  # Python 2
+
+try: from os import scandir  # Python 3.5+
+except ImportError: scandir = None
 
 try: from urlparse import urlparse  # Python 2
 except ImportError: from urllib.parse import urlparse  # Python 3
 
-try:
-    import boto3
-    import botocore.exceptions
-except ImportError: boto3 = None
+# Storage backend packages are slow to import, so they are only imported by the storages that need them (see :func:`_import_boto3`).
+# The globals are only bound once all submodules are imported (the last one bound being checked first), so that other threads never see a partially imported backend.
+boto3 = botocore = None
+gcloud_storage = None
+requests = urllib3 = None
+
+_IMPORT_LOCK = threading.Lock()
+
+
+def _import_boto3(scheme):
+    global boto3, botocore
+
+    if boto3 is not None: return
+
+    with _IMPORT_LOCK:
+        if boto3 is not None: return
+
+        try:
+            for name in ('boto3.s3.transfer', 'botocore.config', 'botocore.exceptions'): import_module(name)
+        except ImportError: raise ImportError('You need to install boto3 package to handle {} URIs.'.format(scheme))
+
+        botocore = sys.modules['botocore']
+        boto3 = sys.modules['boto3']
+    #end with
+#end def
+
+
+def _import_gcloud_storage(scheme):
+    global gcloud_storage
+
+    if gcloud_storage is not None: return
+
+    with _IMPORT_LOCK:
+        if gcloud_storage is not None: return
+
+        try: gcloud_storage = import_module('google.cloud.storage')
+        except ImportError: raise ImportError('You need to install google-cloud-storage package to handle {} URIs.'.format(scheme))
+    #end with
+#end def
+
+
+def _import_requests(scheme):
+    global requests, urllib3
+
+    if requests is not None: return
+
+    with _IMPORT_LOCK:
+        if requests is not None: return
+
+        try:
+            for name in ('requests.adapters', 'urllib3.util.retry'): import_module(name)
+        except ImportError: raise ImportError('You need to install requests package to handle {} URIs.'.format(scheme))
+
+        urllib3 = sys.modules['urllib3']
+        requests = sys.modules['requests']
+    #end with
+#end def
+
+
+_monotonic = getattr(time, 'monotonic', time.time)  # Python 3.3+
+
+try: _TRANSIENT_ERRORS = (ConnectionError, TimeoutError)  # Python 3.3+
+except NameError: _TRANSIENT_ERRORS = ()
+
+_S3_RETRYABLE_CODES = frozenset(['SlowDown', 'Throttling', 'ThrottlingException', 'RequestLimitExceeded', 'RequestTimeout', 'InternalError', 'ServiceUnavailable'])
+"""Error codes of S3 requests that are transient, besides ``5xx`` and ``429`` responses."""
+
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+_URLPARSE_CACHE = {}
+_URLPARSE_CACHE_SIZE = 4096
+
+
+def _urlparse(uri):
+    """Memoized :func:`urlparse`, which saves re-parsing URIs that are used repeatedly (e.g., when polling). :class:`ParseResult` objects are immutable, so they can be shared."""
+
+    o = _URLPARSE_CACHE.get(uri)
+    if o is None:
+        if len(_URLPARSE_CACHE) >= _URLPARSE_CACHE_SIZE: _URLPARSE_CACHE.clear()
+        o = _URLPARSE_CACHE[uri] = urlparse(uri)
+    #end if
+
+    return o
+#end def
+
+
+def _get_boto3_resource(service_name, region_name=None):
+    """
+    Returns a process-wide boto3 resource for ``service_name`` so that connections (and their DNS/TLS setup) are kept alive and reused across URIs.
+    Resources are not thread-safe, but their underlying ``meta.client`` is and can be shared between threads.
+    The size of the connection pool (default 50) can be set with the ``URIUTILS_MAX_POOL_CONNECTIONS`` environment variable, and should be at least the concurrency of S3 transfers.
+    """
+
+    key = ('boto3', service_name, region_name)
+    if key not in _CLIENTS:
+        with _CLIENTS_LOCK:
+            if key not in _CLIENTS:
+                max_pool_connections = int(os.environ.get('URIUTILS_MAX_POOL_CONNECTIONS', '50'))
+                config = botocore.config.Config(max_pool_connections=max_pool_connections, tcp_keepalive=True, retries=dict(mode='adaptive', max_attempts=10))
+                _CLIENTS[key] = boto3.session.Session().resource(service_name, region_name=region_name, config=config)
+            #end if
+        #end with
+    #end if
+
+    return _CLIENTS[key]
+#end def
+
+
+def _has_module(name):
+    """Returns ``True`` if the top-level module ``name`` can be imported, without importing it."""
+
+    try: from importlib.util import find_spec  # Python 3.4+
+    except ImportError: return False
+
+    return find_spec(name) is not None
+#end def
+
+
+def _get_s3_transfer_config():
+    """
+    Returns the :class:`boto3.s3.transfer.TransferConfig` used for S3 transfers.
+    Transfers larger than 8 MiB are split into 8 MiB parts that are transferred over up to 10 concurrent connections, as a single connection to S3 is throughput limited.
+    Anything smaller is transferred with a single request, which avoids the extra round trips of a multipart transfer; the threshold can be set with the ``URIUTILS_S3_MULTIPART_THRESHOLD`` environment variable (in bytes).
+    It asks for the AWS Common Runtime (CRT) transfer client, which splits requests and balances connections across S3 hosts, whenever ``awscrt`` is installed (boto3's own default only uses it on a few instance types); boto3 falls back to the classic transfer manager where the CRT client cannot be used.
+    """
+
+    key = ('boto3', 's3', 'transfer_config')
+    if key not in _CLIENTS:
+        with _CLIENTS_LOCK:
+            if key not in _CLIENTS:
+                multipart_threshold = int(os.environ.get('URIUTILS_S3_MULTIPART_THRESHOLD', str(8 * 1024 * 1024)))
+                kwargs = dict(multipart_threshold=multipart_threshold, multipart_chunksize=8 * 1024 * 1024, max_concurrency=10, use_threads=True)
+                config = None
+                if _has_module('awscrt'):
+                    try: config = boto3.s3.transfer.TransferConfig(preferred_transfer_client='crt', **kwargs)
+                    except TypeError: pass  # boto3 < 1.33 has no CRT support
+                #end if
+                if config is None: config = boto3.s3.transfer.TransferConfig(**kwargs)
+
+                _CLIENTS[key] = config
+            #end if
+        #end with
+    #end if
+
+    return _CLIENTS[key]
+#end def
+
+
+def _get_no_store_cookie_policy():
+    """Returns a cookie policy that rejects all cookies set by responses, but still sends the cookies that are passed explicitly with a request."""
+
+    # Only imported along with requests (which imports it too), as it pulls in much of the standard library's networking modules.
+    try: from http.cookiejar import DefaultCookiePolicy  # Python 3
+    except ImportError: from cookielib import DefaultCookiePolicy  # Python 2
+
+    class _NoStoreCookiePolicy(DefaultCookiePolicy):
+        def set_ok(self, cookie, request):
+            return False
+    #end class
+
+    return _NoStoreCookiePolicy()
+#end def
+
+
+def _get_http_session():
+    """
+    Returns a process-wide :class:`requests.Session` so that HTTP connections are kept alive and reused across requests, instead of setting up a new connection for every request.
+    Unlike a regular session, it never stores cookies from responses, so that they are not sent along with the requests of unrelated callers.
+    Connection errors and ``502``/``503``/``504`` responses are retried up to 5 times with exponential backoff.
+    The number of hosts and connections per host that are pooled can be set with the ``URIUTILS_HTTP_POOL_CONNECTIONS`` (default 20) and ``URIUTILS_HTTP_POOL_MAXSIZE`` (default 50) environment variables.
+    """
+
+    key = ('requests', )
+    if key not in _CLIENTS:
+        with _CLIENTS_LOCK:
+            if key not in _CLIENTS:
+                session = requests.Session()
+                session.cookies.set_policy(_get_no_store_cookie_policy())
+                pool_connections = int(os.environ.get('URIUTILS_HTTP_POOL_CONNECTIONS', '20'))
+                pool_maxsize = int(os.environ.get('URIUTILS_HTTP_POOL_MAXSIZE', '50'))
+                max_retries = urllib3.util.retry.Retry(total=5, backoff_factor=0.3, status_forcelist=[502, 503, 504], raise_on_status=False)
+                adapter = requests.adapters.HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=max_retries)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _CLIENTS[key] = session
+            #end if
+        #end with
+    #end if
+
+    return _CLIENTS[key]
+#end def
+
+
+def _get_aws_region():
+    """Returns the default AWS region, which is only resolved from the environment and configuration files once per process."""
+
+    key = ('boto3', 'region_name')
+    if key not in _CLIENTS:
+        with _CLIENTS_LOCK:
+            if key not in _CLIENTS: _CLIENTS[key] = boto3.session.Session().region_name
+    #end if
+
+    return _CLIENTS[key]
+#end def
+
+
+def _get_aws_account_id():
+    """Returns the AWS account ID of the current credentials, which is only looked up with STS once per process."""
+
+    key = ('boto3', 'sts', 'account_id')
+    if key not in _CLIENTS:
+        with _CLIENTS_LOCK:
+            if key not in _CLIENTS: _CLIENTS[key] = boto3.client('sts').get_caller_identity().get('Account')
+    #end if
+
+    return _CLIENTS[key]
+#end def
+
+
+def _get_gs_client():
+    """Returns a process-wide Google Cloud storage client so that its connection pool is reused across URIs."""
+
+    key = ('gcloud_storage', )
+    if key not in _CLIENTS:
+        with _CLIENTS_LOCK:
+            if key not in _CLIENTS: _CLIENTS[key] = gcloud_storage.Client()
+    #end if
+
+    return _CLIENTS[key]
+#end def
+
+
+_COPY_RANGE_FUNCS = []
+"""Functions that copy ``count`` bytes at ``offset`` between file descriptors within the kernel, in order of preference."""
+
+if hasattr(os, 'copy_file_range'): _COPY_RANGE_FUNCS.append(lambda fd_in, fd_out, offset, count: os.copy_file_range(fd_in, fd_out, count, offset, offset))  # Linux, Python 3.8+
+if hasattr(os, 'sendfile'): _COPY_RANGE_FUNCS.append(lambda fd_in, fd_out, offset, count: os.sendfile(fd_out, fd_in, offset, count))
+
+
+def _copyfile(src, dst, length=1024 * 1024):
+    """
+    Copies the local file ``src`` to ``dst``.
+    Regular files are copied within the kernel so that the data never passes through userspace, preferring :func:`os.copy_file_range` (which makes instant copy-on-write copies on filesystems such as Btrfs and XFS) over :func:`os.sendfile`.
+    Otherwise (or if the platform does not support either), falls back to :func:`shutil.copyfileobj` with a buffer of ``length`` bytes.
+    Like :func:`shutil.copyfile`, copies until the end of ``src`` rather than its reported size (which is 0 for files in procfs or sysfs), and raises :exc:`shutil.SameFileError` if ``src`` and ``dst`` are the same file.
+    """
+
+    if hasattr(os.path, 'samefile') and os.path.exists(dst) and os.path.samefile(src, dst):
+        raise getattr(shutil, 'SameFileError', IOError)('{!r} and {!r} are the same file'.format(src, dst))
+
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        offset = 0
+        st = os.fstat(fsrc.fileno())
+        if stat.S_ISREG(st.st_mode):
+            blocksize = min(max(st.st_size, 8 * 1024 * 1024), 2 ** 30)
+            for copy_range in _COPY_RANGE_FUNCS:
+                try:
+                    while True:
+                        copied = copy_range(fsrc.fileno(), fdst.fileno(), offset, blocksize)
+                        if copied == 0: break
+                        offset += copied
+                    #end while
+
+                    if offset: return
+                    break  # nothing copied: either an empty file, or a special file that the kernel cannot copy, so read it normally to be sure
+                except OSError: fdst.seek(offset)  # copy_file_range does not move the file position of dst
+            #end for
+        #end if
+
+        fsrc.seek(offset)
+        fdst.seek(offset)
+        shutil.copyfileobj(fsrc, fdst, length)
+    #end with
+#end def
+
+
+def _read_into(stream, view, chunk_size=1024 * 1024):
+    """
+    Fills the :class:`memoryview` ``view`` with content read from ``stream``.
+    Uses ``readinto`` when the stream supports it so that the content is written directly into ``view``, and otherwise copies it over in chunks of ``chunk_size`` bytes.
+    """
+
+    readinto = getattr(stream, 'readinto', None)
+    pos = 0
+    while pos < len(view):
+        if readinto is not None: n = readinto(view[pos:pos + chunk_size])
+        else:
+            data = stream.read(min(chunk_size, len(view) - pos))
+            n = len(data)
+            view[pos:pos + n] = data
+        #end if
+
+        if not n: raise IOError('Stream ended after {} of {} bytes.'.format(pos, len(view)))
+        pos += n
+    #end while
+#end def
+
+
+_BUFFER_POOLS = {}
+_BUFFER_POOL_SIZE = 4
+
+
+def _acquire_buffer(size):
+    """Returns a :class:`bytearray` of ``size`` bytes, reusing one released by :func:`_release_buffer` when possible."""
+
+    pool = _BUFFER_POOLS.get(size)
+    if pool is None: return bytearray(size)  # nothing was released at this size yet
+
+    try: return pool.get_nowait()
+    except queue.Empty: return bytearray(size)
+#end def
+
+
+def _release_buffer(buf):
+    """Returns ``buf`` to the pool for its size; at most :data:`_BUFFER_POOL_SIZE` buffers are kept per size."""
+
+    pool = _BUFFER_POOLS.get(len(buf))
+    if pool is None: pool = _BUFFER_POOLS.setdefault(len(buf), queue.LifoQueue(maxsize=_BUFFER_POOL_SIZE))  # another thread may have just created one
+
+    try: pool.put_nowait(buf)
+    except queue.Full: pass
+#end def
+
+
+def _as_bytes(content):
+    """Returns ``content`` as :class:`bytes` if it is a :class:`memoryview`, for storage clients that only accept bytestrings; anything else is returned as is."""
+
+    return content.tobytes() if isinstance(content, memoryview) else content
+#end def
+
+
+def _byte_view(b):
+    """Returns a flat :class:`memoryview` of the bytes in the buffer ``b``, so that it is sliced and sized in bytes whatever the item format of ``b`` (e.g., an :class:`array.array` of integers)."""
+
+    view = memoryview(b)
+    if view.format != 'B' or view.ndim != 1:
+        try: view = view.cast('B')  # Python 3.3+
+        except (AttributeError, TypeError): view = memoryview(view.tobytes())  # Python 2, or a non-contiguous buffer
+    #end if
+
+    return view
+#end def
+
+
+def _prefetch(iterable, size=1):
+    """
+    Iterates over ``iterable`` in a background thread that stays up to ``size`` items ahead of the consumer, so that fetching the next item (e.g., a page of listing results) overlaps with processing the current one.
+    Exceptions raised by ``iterable`` are re-raised in the consumer.
+    """
+
+    q = queue.Queue(size)
+    stopped = threading.Event()
+    end = object()
+
+    def _put(entry):
+        while not stopped.is_set():
+            try: return q.put(entry, timeout=0.1)
+            except queue.Full: pass
+        #end while
+    #end def
+
+    def _produce():
+        try:
+            for item in iterable:
+                if stopped.is_set(): return
+                _put((item, None))
+            #end for
+
+            _put((end, None))
+        except Exception as e: _put((end, e))
+    #end def
+
+    thread = threading.Thread(target=_produce)
+    thread.daemon = True
+    thread.start()
+
+    try:
+        while True:
+            item, error = q.get()
+            if item is end:
+                if error is not None: raise error
+                return
+            #end if
 
-try:
-    from google.cloud import storage as gcloud_storage
-    import google.cloud.exceptions
-except ImportError: gcloud_storage = None
+            yield item
+        #end while
+    finally: stopped.set()  # lets the producer exit if the consumer stops early
+#end def
 
-try: import requests
-except ImportError: requests = None
+
+def _local_path(o):
+    """Returns the local file path of the parsed ``file://`` URI ``o``, where a non-empty netloc is treated as the first path component (i.e., ``file://dir/name``)."""
+
+    return (o.netloc + '/' + o.path.lstrip('/')).rstrip('/') if o.netloc else o.path
+#end def
 
 
 class URIBytesOutput(BytesIO):
     """A BytesIO object for output that flushes content to the remote URI on close."""
 
-    def __init__(self, uri_obj):
+    def __init__(self, uri_obj, size_hint=None):
+        """
+        :param BaseURI uri_obj: Storage object to flush content to
+        :param int size_hint: Expected size of the content in bytes, which is allocated upfront so that the buffer is not repeatedly grown (and copied) while it is written; the unused part is truncated on close, or as soon as the content is read back or sought relative to its end
+        """
+
         super(URIBytesOutput, self).__init__()
         self.uri_obj = uri_obj
+        self.size_hint = size_hint
+        self._end = 0  # end of the content written so far, as the buffer may extend beyond it
+        self._padded = False
+        self.aborted = False
+
+        if size_hint:
+            # Writing the last byte grows the buffer to its full (zero-filled) size at once, without building a temporary of that size.
+            self.seek(size_hint - 1)
+            super(URIBytesOutput, self).write(b'\0')
+            self.seek(0)
+            self._padded = True
+        #end if
+    #end def
+
+    def _trim(self):
+        """Truncates the unused part of the buffer allocated for :attr:`size_hint`, so that it is never exposed as content."""
+
+        if self._padded:
+            self._padded = False
+            super(URIBytesOutput, self).truncate(self._end)
+        #end if
+    #end def
+
+    def seek(self, pos, whence=0):
+        if whence == 2: self._trim()
+        return super(URIBytesOutput, self).seek(pos, whence)
+    #end def
+
+    def getvalue(self):
+        self._trim()
+        return super(URIBytesOutput, self).getvalue()
+    #end def
+
+    def getbuffer(self):
+        self._trim()
+        return super(URIBytesOutput, self).getbuffer()
+    #end def
+
+    def read(self, size=-1):
+        self._trim()
+        return super(URIBytesOutput, self).read(size)
+    #end def
+
+    def read1(self, size=-1):
+        self._trim()
+        return super(URIBytesOutput, self).read1(size)
+    #end def
+
+    def readinto(self, b):
+        self._trim()
+        return super(URIBytesOutput, self).readinto(b)
+    #end def
+
+    def readline(self, size=-1):
+        self._trim()
+        return super(URIBytesOutput, self).readline(size)
+    #end def
+
+    def readlines(self, hint=-1):
+        self._trim()
+        return super(URIBytesOutput, self).readlines(hint)
+    #end def
+
+    def __iter__(self):
+        self._trim()
+        return super(URIBytesOutput, self).__iter__()
+    #end def
+
+    def write(self, b):
+        n = super(URIBytesOutput, self).write(b)
+        self._end = max(self._end, self.tell())
+        return n
+    #end def
+
+    def writelines(self, lines):
+        for line in lines: self.write(line)
+
+    def truncate(self, size=None):
+        size = super(URIBytesOutput, self).truncate(size)
+        self._end = min(self._end, size)
+        return size
+    #end def
+
+    def abort(self):
+        """Discards the content written so far, so that closing the stream (explicitly or when it is garbage collected) does not upload anything."""
+
+        self.aborted = True
+        self.close()
     #end def
 
     def close(self):
-        if not self.closed:
-            self.uri_obj.put_content(self.getvalue())
+        if not self.closed and self.aborted: super(URIBytesOutput, self).close()
+        elif not self.closed:
+            self._trim()
+
+            # A view of the buffer avoids copying the content; it must be released before the buffer can be closed.
+            content = self.getbuffer() if hasattr(self, 'getbuffer') else self.getvalue()  # getbuffer is Python 3.2+
+            try: self.uri_obj.put_content(content)
+            finally:
+                if isinstance(content, memoryview): content.release()
+            #end try
+
             super(URIBytesOutput, self).close()
         #end if
     #end def
@@ -47,6 +546,33 @@ class URIBytesOutput(BytesIO):
 #end class
 
 
+class _StreamingInput(RawIOBase):
+    """Adapts a streaming response body that only exposes ``read(n)`` into a raw stream that can be wrapped by :class:`io.BufferedReader`."""
+
+    def __init__(self, stream, name):
+        super(_StreamingInput, self).__init__()
+        self.stream = stream
+        self.name = name
+    #end def
+
+    def readable(self): return True
+
+    def readinto(self, b):
+        data = self.stream.read(len(b))
+        n = len(data)
+        b[:n] = data
+        return n
+    #end def
+
+    def close(self):
+        if not self.closed:
+            self.stream.close()
+            super(_StreamingInput, self).close()
+        #end if
+    #end def
+#end class
+
+
 class BaseURI(object):
     """
     This is the base URI storage object that is inherited by the different storage systems.
@@ -57,11 +583,22 @@ class BaseURI(object):
     SUPPORTED_SCHEMES = []
     """Defines the schemes supported by this storage system."""
 
-    VALID_STORAGE_ARGS = []
+    VALID_STORAGE_ARGS = frozenset()
     """The set of ``storage_args`` keyword arguments that is handled by this storage system."""
 
+    SEEKABLE_STREAMS = False
+    """Whether the streams returned by :meth:`open_stream` are seekable, in which case :func:`~uriutils.uriutils.uri_open` uses them even when streaming is not asked for."""
+
+    HEAD_CACHE_TTL = float(os.environ.get('URIUTILS_HEAD_CACHE_TTL', '5'))
+    """
+    Number of seconds for which a successful ``HEAD`` request is reused by later calls to :meth:`exists` (and :meth:`get_metadata` where the storage system supports it) on the same object, which can be set with the ``URIUTILS_HEAD_CACHE_TTL`` environment variable.
+    Missing objects are never cached, and writing through the object invalidates the cache.
+    """
+
+    _head_time = None
+
     @classmethod
-    def parse_uri(cls, uri, storage_args={}):
+    def parse_uri(cls, uri, storage_args=None):
         """
         Parses the URI and return an instantiation of the storage system if it is supported.
 
@@ -73,17 +610,18 @@ class BaseURI(object):
         raise NotImplementedError('`parse_uri` is not implemented for {}.'.format(type(cls).__name__))
     #end def
 
-    def __init__(self, storage_args={}):
+    def __init__(self, storage_args=None):
         """
         :param dict storage_args: Arguments that will be applied to the storage system for read/write operations
         """
-        self.storage_args = {}
-        for k in storage_args.keys():
-            if k in self.VALID_STORAGE_ARGS:
-                self.storage_args[k] = storage_args[k]
-            else:
-                warnings.warn('"{}" is not a valid storage argument.'.format(k), category=UserWarning, stacklevel=2)
-        #end for
+        if storage_args is None: storage_args = {}
+
+        self.storage_args = {k: v for k, v in storage_args.items() if k in self.VALID_STORAGE_ARGS}
+        if len(self.storage_args) < len(storage_args):
+            invalid = [k for k in sorted(storage_args) if k not in self.VALID_STORAGE_ARGS]
+            if len(invalid) == 1: warnings.warn('"{}" is not a valid storage argument.'.format(invalid[0]), category=UserWarning, stacklevel=2)
+            else: warnings.warn('{} are not valid storage arguments.'.format(', '.join('"{}"'.format(k) for k in invalid)), category=UserWarning, stacklevel=2)
+        #end if
     #end def
 
     def get_content(self):
@@ -95,14 +633,35 @@ class BaseURI(object):
         raise NotImplementedError('`get_content` is not implemented for {}.'.format(type(self).__name__))
     #end def
 
+    def open_stream(self):
+        """
+        Open the content stored at this object's URI for incremental reading, without buffering all of it in memory.
+
+        :returns: a raw binary stream that can be wrapped by :class:`io.BufferedReader`
+        """
+
+        raise NotImplementedError('`open_stream` is not implemented for {}.'.format(type(self).__name__))
+    #end def
+
     def put_content(self, content):
         """
-        :param bytes content: Content to write to this object's URI
+        :param bytes content: Content to write to this object's URI; any bytes-like object (e.g., :class:`bytearray` or :class:`memoryview`) is accepted
         """
 
         raise NotImplementedError('`put_content` is not implemented for {}.'.format(type(self).__name__))
     #end def
 
+    def open_upload_stream(self):
+        """
+        Open a writable stream that uploads content to this object's URI as it is written, without buffering all of it in memory.
+        The upload is completed when the stream is closed.
+
+        :returns: a writable binary file-like object
+        """
+
+        raise NotImplementedError('`open_upload_stream` is not implemented for {}.'.format(type(self).__name__))
+    #end def
+
     def download_file(self, filename):
         """
         Download the binary content stored in the URI for this object directly to local file.
@@ -113,6 +672,32 @@ class BaseURI(object):
         raise NotImplementedError('`download_file` is not implemented for {}.'.format(type(self).__name__))
     #end def
 
+    def download_fileobj(self, fileobj):
+        """
+        Download the binary content stored in the URI for this object into a writable binary file-like object.
+        Storage systems that can stream their content write it in chunks, without holding all of it in memory.
+
+        :param fileobj: Writable binary file-like object
+        """
+
+        fileobj.write(self.get_content())
+    #end def
+
+    def download_file_if_modified(self, filename, etag=None):
+        """
+        Download the binary content stored in the URI for this object to local file, unless it is unchanged since it was downloaded with ``etag``.
+        Storage systems without conditional requests always download the content.
+
+        :param str filename: Filename on local filesystem
+        :param str etag: ETag of a previously downloaded copy of the content
+        :returns: tuple of whether the content was downloaded, and its ETag (``None`` if unknown)
+        :rtype: tuple
+        """
+
+        self.download_file(filename)
+        return True, None
+    #end def
+
     def upload_file(self, filename):
         """
         Upload the binary content in ``filename`` to the URI for this object.
@@ -141,6 +726,16 @@ class BaseURI(object):
         raise NotImplementedError('`exists` is not implemented for {}.'.format(type(self).__name__))
     #end def
 
+    def is_transient_error(self, e):
+        """
+        :param Exception e: Exception raised by an operation on this object
+        :returns: ``True`` if ``e`` is transient (e.g., a throttling, server or connection error), so that the operation may be retried later
+        :rtype: bool
+        """
+
+        return isinstance(e, _TRANSIENT_ERRORS)
+    #end def
+
     def dir_exists(self):
         """
         Check if the URI exists as a directory.
@@ -171,7 +766,7 @@ class BaseURI(object):
         :rtype: BaseURI
         """
 
-        return self.parse_uri(urlparse(os.path.join(str(self), path)), storage_args=self.storage_args)
+        return self.parse_uri(_urlparse(os.path.join(str(self), path)), storage_args=self.storage_args)
 
     def __str__(self):
         """
@@ -181,6 +776,14 @@ class BaseURI(object):
         raise NotImplementedError('`__str__` is not implemented for {}.'.format(type(self).__name__))
     #end def
 
+    def _head_cached(self):
+        """:returns: ``True`` if a ``HEAD`` request on this object succeeded within the last :attr:`HEAD_CACHE_TTL` seconds"""
+
+        return self._head_time is not None and _monotonic() - self._head_time < self.HEAD_CACHE_TTL
+
+    def _set_head_cached(self, cached=True):
+        self._head_time = _monotonic() if cached else None
+
     def __unicode__(self):
         return self.__str__()
 
@@ -200,17 +803,18 @@ class FileURI(BaseURI):
     SUPPORTED_SCHEMES = set(['file', ''])
     """Supported schemes for :class:`FileURI`."""
 
-    VALID_STORAGE_ARGS = ['mode', 'buffering', 'encoding', 'errors', 'newline', 'closefd', 'opener']
+    VALID_STORAGE_ARGS = frozenset(['mode', 'buffering', 'encoding', 'errors', 'newline', 'closefd', 'opener'])
     """Storage arguments allowed to pass to :meth:`open` methods."""
 
+    SEEKABLE_STREAMS = True
+
     @classmethod
-    def parse_uri(cls, uri, storage_args={}):
+    def parse_uri(cls, uri, storage_args=None):
         if uri.scheme not in cls.SUPPORTED_SCHEMES: return None
-        filepath = os.path.join(uri.netloc, uri.path.lstrip('/')).rstrip('/') if uri.netloc else uri.path
-        return FileURI(filepath, storage_args=storage_args)
+        return FileURI(_local_path(uri), storage_args=storage_args)
     #end def
 
-    def __init__(self, filepath, storage_args={}):
+    def __init__(self, filepath, storage_args=None):
         super(FileURI, self).__init__(storage_args=storage_args)
         self.filepath = filepath
     #end def
@@ -220,16 +824,29 @@ class FileURI(BaseURI):
             return f.read()
     #end def
 
+    def open_stream(self):
+        if not self.storage_args: return FileIO(self.filepath, 'rb')  # unbuffered, as :func:`uri_open` buffers it
+        return open(self.filepath, 'rb', **self.storage_args)
+    #end def
+
+    def open_upload_stream(self):
+        return open(self.filepath, 'wb', **self.storage_args)
+
     def put_content(self, content):
         with open(self.filepath, 'wb', **self.storage_args) as f:
             return f.write(content)
 
     def download_file(self, filename):
-        shutil.copyfile(self.filepath, filename)
+        _copyfile(self.filepath, filename)
+    #end def
+
+    def download_fileobj(self, fileobj):
+        with open(self.filepath, 'rb') as f:
+            shutil.copyfileobj(f, fileobj, 1024 * 1024)
     #end def
 
     def upload_file(self, filename):
-        shutil.copyfile(filename, self.filepath)
+        _copyfile(filename, self.filepath)
 
     def exists(self):
         return os.path.exists(self.filepath)
@@ -241,8 +858,37 @@ class FileURI(BaseURI):
         os.makedirs(self.filepath)
 
     def list_dir(self):
-        for fname in os.listdir(self.filepath):
-            yield os.path.join(self.filepath, fname)
+        if scandir is None:
+            for fname in os.listdir(self.filepath):
+                yield os.path.join(self.filepath, fname)
+        else:
+            for entry in self.list_dir_entries():
+                yield entry.path
+        #end if
+    #end def
+
+    def list_dir_entries(self):
+        """
+        Same as :meth:`list_dir`, but yields the :class:`os.DirEntry` objects, so that their file type and ``stat`` information can be used without another system call.
+
+        :returns: A generator over :class:`os.DirEntry` objects in this directory.
+        """
+
+        if scandir is None: raise NotImplementedError('`list_dir_entries` requires Python 3.5+.')
+
+        it = scandir(self.filepath)
+        try:
+            for entry in it:
+                yield entry
+        finally:
+            if hasattr(it, 'close'): it.close()  # Python 3.6+
+        #end try
+    #end def
+
+    def join(self, path):
+        """Joins local paths directly, as the joined path of a local file is always a local file (or an absolute ``path``)."""
+
+        return FileURI(os.path.join(self.filepath, path), storage_args=self.storage_args)
 
     def __str__(self):
         return self.filepath
@@ -257,22 +903,39 @@ class S3URI(BaseURI):
     SUPPORTED_SCHEMES = set(['s3'])
     """Supported schemes for :class:`S3URI`."""
 
-    VALID_STORAGE_ARGS = ['ACL', 'CacheControl', 'ContentDisposition', 'ContentEncoding', 'ContentLanguage', 'ContentLength', 'ContentMD5', 'ContentType', 'Expires', 'GrantFullControl', 'GrantRead', 'GrantReadACP', 'GrantWriteACP', 'Metadata', 'ServerSideEncryption', 'StorageClass', 'WebsiteRedirectLocation', 'SSECustomerAlgorithm', 'SSECustomerKey', 'SSEKMSKeyId', 'RequestPayer', 'Tagging']
+    VALID_STORAGE_ARGS = frozenset(['ACL', 'CacheControl', 'ContentDisposition', 'ContentEncoding', 'ContentLanguage', 'ContentLength', 'ContentMD5', 'ContentType', 'Expires', 'GrantFullControl', 'GrantRead', 'GrantReadACP', 'GrantWriteACP', 'Metadata', 'ServerSideEncryption', 'StorageClass', 'WebsiteRedirectLocation', 'SSECustomerAlgorithm', 'SSECustomerKey', 'SSEKMSKeyId', 'RequestPayer', 'Tagging'])
     """Storage arguments allowed to pass to :class:`S3.Client` methods."""
 
     s3_resource = None
+    s3_client = None
 
     @classmethod
-    def parse_uri(cls, uri, storage_args={}):
+    def parse_uri(cls, uri, storage_args=None):
         if uri.scheme not in cls.SUPPORTED_SCHEMES: return None
-        if boto3 is None: raise ImportError('You need to install boto3 package to handle {} URIs.'.format(uri.scheme))
+        _import_boto3(uri.scheme)
 
-        if cls.s3_resource is None: cls.s3_resource = boto3.resource('s3')
+        cls._get_client()
 
         return S3URI(uri.netloc, uri.path.lstrip('/'), storage_args=storage_args)
     #end def
 
-    def __init__(self, bucket, key, storage_args={}):
+    @classmethod
+    def _get_resource(cls):
+        """Returns :attr:`s3_resource`, (re)creating it if it was never created or was dropped after a fork."""
+
+        if cls.s3_resource is None: cls.s3_resource = _get_boto3_resource('s3')
+        return cls.s3_resource
+    #end def
+
+    @classmethod
+    def _get_client(cls):
+        """Returns :attr:`s3_client`, the thread-safe low-level client of :attr:`s3_resource`, (re)creating it if it was never created or was dropped after a fork."""
+
+        if cls.s3_client is None: cls.s3_client = cls._get_resource().meta.client
+        return cls.s3_client
+    #end def
+
+    def __init__(self, bucket, key, storage_args=None):
         """
         :param str bucket: Bucket name
         :param str key: Key to file
@@ -281,36 +944,187 @@ class S3URI(BaseURI):
 
         super(S3URI, self).__init__(storage_args=storage_args)
 
-        self.s3_object = self.s3_resource.Object(bucket, key)
+        # All operations go through the low-level client, as a resource object is much more expensive to create for every URI.
+        self.bucket = bucket
+        self.key = key
+        self._head = None
+        self._s3_object = None
+
+        # The subsets of storage arguments accepted by downloads and uploads are only composed once, instead of on every request.
+        # They are copied when passed as `ExtraArgs`, which the transfer manager may modify.
+        self._download_args = dict((k, v) for k, v in self.storage_args.items() if k in boto3.s3.transfer.S3Transfer.ALLOWED_DOWNLOAD_ARGS)
+        self._upload_args = dict((k, v) for k, v in self.storage_args.items() if k in boto3.s3.transfer.S3Transfer.ALLOWED_UPLOAD_ARGS)
+    #end def
+
+    @property
+    def s3_object(self):
+        """The :class:`S3.Object` resource for this URI, which is only created when it is accessed."""
+
+        if self._s3_object is None: self._s3_object = self._get_resource().Object(self.bucket, self.key)
+        return self._s3_object
+    #end def
+
+    def _head_object(self):
+        """:returns: the (cached, see :attr:`HEAD_CACHE_TTL`) response of a ``HEAD`` request for this object"""
+
+        if not self._head_cached():
+            self._head = self._get_client().head_object(Bucket=self.bucket, Key=self.key, **self._download_args)
+            self._set_head_cached()
+        #end if
+
+        return self._head
     #end def
 
     def get_content(self):
-        r = self.s3_object.get(**self.storage_args)
-        return r['Body'].read()
+        """
+        The first ``GET`` request asks for the range up to the multipart threshold of :func:`_get_s3_transfer_config`, which returns the whole of smaller objects and the size of larger ones, without a separate ``HEAD`` request.
+        The rest of larger objects is split into ranged ``GET`` requests that are fetched concurrently into a preallocated buffer, using the same part size and concurrency as other S3 transfers.
+        A single connection to S3 is throughput limited, so this is much faster for large objects.
+        If the object is overwritten while its parts are fetched (failing their ``IfMatch`` precondition), it is read again once.
+
+        :returns: the content as :class:`bytes`, or for objects larger than the multipart threshold, as the preallocated :class:`bytearray` that the parts were fetched into (which saves copying all of it again)
+        :rtype: bytes, bytearray
+        """
+
+        try: return self._get_content()
+        except botocore.exceptions.ClientError as e:
+            if e.response.get('Error', {}).get('Code') not in ('PreconditionFailed', '412'): raise
+        #end try
+
+        self._set_head_cached(False)  # any cached `HEAD` response is of the overwritten object
+
+        return self._get_content()
+    #end def
+
+    def _get_content(self):
+        client = self._get_client()
+        transfer_config = _get_s3_transfer_config()
+        first_size = transfer_config.multipart_threshold
+
+        try: r = client.get_object(Bucket=self.bucket, Key=self.key, Range='bytes=0-{}'.format(first_size - 1), **self._download_args)
+        except botocore.exceptions.ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'InvalidRange': raise
+            r = client.get_object(Bucket=self.bucket, Key=self.key, **self._download_args)  # empty objects cannot be requested by range
+        #end try
+
+        content_range = r.get('ContentRange')  # e.g., "bytes 0-8388607/20971520"
+        size = int(content_range.rsplit('/', 1)[1]) if content_range else None
+        if size is None or size <= first_size: return r['Body'].read()
+
+        # The remaining parts must come from the same version of the object as the first one.
+        download_args = dict(self._download_args, IfMatch=r['ETag'])
+
+        buf = bytearray(size)
+        view = memoryview(buf)
+        _read_into(r['Body'], view[:first_size])
+
+        def _get_range(lo):
+            hi = min(lo + transfer_config.multipart_chunksize, size) - 1
+            r = client.get_object(Bucket=self.bucket, Key=self.key, Range='bytes={}-{}'.format(lo, hi), **download_args)
+            _read_into(r['Body'], view[lo:hi + 1])
+        #end def
+
+        with ThreadPoolExecutor(max_workers=transfer_config.max_request_concurrency) as executor:
+            futures = [executor.submit(_get_range, lo) for lo in range(first_size, size, transfer_config.multipart_chunksize)]
+            for future in futures: future.result()
+        #end with
+
+        return buf
+    #end def
+
+    def open_stream(self):
+        """Streams the body of the ``GET`` response instead of reading it into memory."""
+
+        r = self._get_client().get_object(Bucket=self.bucket, Key=self.key, **self._download_args)
+        return _StreamingInput(r['Body'], str(self))
     #end def
 
     def put_content(self, content):
-        self.s3_object.put(Body=content, **self.storage_args)
+        """
+        Content up to the multipart threshold of :func:`_get_s3_transfer_config` is uploaded with a single ``PutObject`` request, bypassing the transfer manager.
+        Larger content is uploaded as concurrent parts, which also lifts the 5 GiB limit of a single ``PUT``.
+        """
+
+        self._set_head_cached(False)
+
+        transfer_config = _get_s3_transfer_config()
+        if len(content) > transfer_config.multipart_threshold:
+            self._get_client().upload_fileobj(BytesIO(content), self.bucket, self.key, ExtraArgs=dict(self._upload_args), Config=transfer_config)
+        else: self._get_client().put_object(Bucket=self.bucket, Key=self.key, Body=_as_bytes(content), **self.storage_args)
+    #end def
+
+    def open_upload_stream(self):
+        """
+        Uploads content as a multipart upload while it is being written, with the same threshold, part size and concurrency as other S3 transfers (see :func:`_get_s3_transfer_config`).
+        Content up to the multipart threshold is uploaded with a single ``PUT`` instead.
+        """
+
+        transfer_config = _get_s3_transfer_config()
+        return _S3MultipartOutput(self, part_size=transfer_config.multipart_chunksize, max_workers=transfer_config.max_request_concurrency, threshold=transfer_config.multipart_threshold)
 
     def download_file(self, filename):
-        self.s3_object.download_file(filename, **self.storage_args)
+        """Downloads large files as concurrent ranged ``GET`` requests, using the CRT transfer client when ``awscrt`` is installed (see :func:`_get_s3_transfer_config`)."""
+
+        self._get_client().download_file(self.bucket, self.key, filename, ExtraArgs=dict(self._download_args), Config=_get_s3_transfer_config())
+
+    def download_fileobj(self, fileobj):
+        """Streams the content into ``fileobj`` with the same transfer settings as :meth:`download_file`, without reading it into memory first."""
+
+        self._get_client().download_fileobj(self.bucket, self.key, fileobj, ExtraArgs=dict(self._download_args), Config=_get_s3_transfer_config())
+
+    def download_file_if_modified(self, filename, etag=None):
+        """Makes a conditional ``GET`` request using ``IfNoneMatch``."""
+
+        kwargs = self._download_args
+        if etag: kwargs = dict(kwargs, IfNoneMatch=etag)
+
+        try: r = self._get_client().get_object(Bucket=self.bucket, Key=self.key, **kwargs)
+        except botocore.exceptions.ClientError as e:
+            if e.response.get('Error', {}).get('Code') == '304': return False, etag
+            raise
+        #end try
+
+        with open(filename, 'wb') as f:
+            shutil.copyfileobj(r['Body'], f, 1024 * 1024)
+
+        return True, r.get('ETag')
+    #end def
 
     def upload_file(self, filename):
-        self.s3_object.upload_file(filename, ExtraArgs=self.storage_args)
+        """Uploads large files as concurrent parts, using the CRT transfer client when ``awscrt`` is installed (see :func:`_get_s3_transfer_config`)."""
+
+        self._set_head_cached(False)
+        self._get_client().upload_file(filename, self.bucket, self.key, ExtraArgs=dict(self._upload_args), Config=_get_s3_transfer_config())
 
     def get_metadata(self):
         """Uses ``HEAD`` requests for efficiency."""
 
-        self.s3_object.load()
-        return self.s3_object.metadata
+        return self._head_object().get('Metadata', {})
 
     def exists(self):
-        """Uses ``HEAD`` requests for efficiency."""
+        """
+        Uses ``HEAD`` requests for efficiency.
+        Throttling and server errors are retried by the client (see :func:`_get_boto3_resource`) and raised if they persist, instead of being mistaken for a missing object.
+        A ``403`` response is taken to mean that the object does not exist, as S3 responds so to requests for missing keys from callers without the ``s3:ListBucket`` permission.
+        """
 
         try:
-            self.s3_object.load()
+            self._head_object()
             return True
-        except botocore.exceptions.ClientError: return False
+        except botocore.exceptions.ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound', '403', 'AccessDenied', 'Forbidden'): return False
+            raise
+        #end try
+    #end def
+
+    def is_transient_error(self, e):
+        if isinstance(e, botocore.exceptions.ClientError):
+            status = e.response.get('ResponseMetadata', {}).get('HTTPStatusCode') or 0
+            return e.response.get('Error', {}).get('Code') in _S3_RETRYABLE_CODES or status >= 500 or status == 429
+        #end if
+
+        connection_errors = tuple(getattr(botocore.exceptions, name) for name in ('ConnectionError', 'HTTPClientError') if hasattr(botocore.exceptions, name))
+        return isinstance(e, connection_errors) or super(S3URI, self).is_transient_error(e)
     #end def
 
     def dir_exists(self): return True
@@ -326,16 +1140,151 @@ class S3URI(BaseURI):
         :returns: A generator over files in this "directory" for efficiency.
         """
 
-        bucket = self.s3_object.Bucket()
-        prefix = self.s3_object.key
+        prefix = self.key
         if not prefix.endswith('/'): prefix += '/'
 
-        for obj in bucket.objects.filter(Delimiter='/', Prefix=prefix):
-            yield 's3://{}/{}'.format(obj.bucket_name, obj.key)
+        kwargs = dict((k, v) for k, v in self.storage_args.items() if k == 'RequestPayer')
+        paginator = self._get_client().get_paginator('list_objects_v2')
+        pages = paginator.paginate(Bucket=self.bucket, Prefix=prefix, Delimiter='/', PaginationConfig=dict(PageSize=1000), **kwargs)
+
+        # The next page is requested in the background while the current one is consumed.
+        for page in _prefetch(pages):
+            for obj in page.get('Contents', ()):
+                yield 's3://{}/{}'.format(self.bucket, obj['Key'])
+        #end for
     #end def
 
     def __str__(self):
-        return 's3://{}/{}'.format(self.s3_object.bucket_name, self.s3_object.key)
+        return 's3://{}/{}'.format(self.bucket, self.key)
+#end class
+
+
+class _S3MultipartOutput(BufferedIOBase):
+    """A writable stream that uploads to S3 in parts as content is written, so that network upload overlaps with the producer."""
+
+    PART_STORAGE_ARGS = frozenset(['SSECustomerAlgorithm', 'SSECustomerKey', 'RequestPayer'])
+    """Storage arguments that have to be repeated for every part request."""
+
+    def __init__(self, uri_obj, part_size, max_workers, threshold=None):
+        """
+        :param S3URI uri_obj: Storage object to upload to
+        :param int part_size: Size of each part; S3 requires at least 5 MiB for all but the last part
+        :param int max_workers: Maximum number of concurrent part uploads
+        :param int threshold: Size above which content is uploaded as a multipart upload rather than with a single ``PUT`` (defaults to ``part_size``)
+        """
+
+        super(_S3MultipartOutput, self).__init__()
+
+        self.uri_obj = uri_obj
+        self.part_size = part_size
+        self.max_workers = max_workers
+        self.threshold = part_size if threshold is None else threshold
+
+        self.buf = bytearray()
+        self.pos = 0
+        self.upload_id = None
+        self.executor = None
+        self.futures = []
+        self.slots = threading.BoundedSemaphore(max_workers)
+        self.aborted = False
+    #end def
+
+    def abort(self):
+        """Discards the content written so far, so that closing the stream (explicitly or when it is garbage collected) does not upload anything."""
+
+        self.aborted = True
+        self.close()
+    #end def
+
+    def writable(self): return True
+
+    def write(self, b):
+        if self.closed: raise ValueError('I/O operation on closed file.')
+
+        view = _byte_view(b)
+        n = len(view)
+        while view:
+            if self.pos == self._buf_limit(): self._upload_part()  # only once there is more content, which may not be the case on close
+
+            chunk = view[:self._buf_limit() - self.pos]
+            self.buf[self.pos:self.pos + len(chunk)] = chunk
+            self.pos += len(chunk)
+            view = view[len(chunk):]
+        #end while
+
+        return n
+    #end def
+
+    def _buf_limit(self):
+        # Content up to the threshold is held in the first buffer, which becomes the first part once the content grows beyond it.
+        return self.part_size if self.upload_id is not None else max(self.part_size, self.threshold)
+    #end def
+
+    def _upload_part(self):
+        uri_obj = self.uri_obj
+        client = uri_obj._get_client()
+        part_args = dict((k, v) for k, v in self.uri_obj.storage_args.items() if k in self.PART_STORAGE_ARGS)
+
+        if self.upload_id is None:
+            create_args = dict((k, v) for k, v in self.uri_obj.storage_args.items() if k not in ('ContentLength', 'ContentMD5'))
+            r = client.create_multipart_upload(Bucket=uri_obj.bucket, Key=uri_obj.key, **create_args)
+            self.upload_id = r['UploadId']
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        #end if
+
+        # The first buffer grows as it is written to; once a multipart upload has started, every part is filled into a pooled fixed-size buffer instead.
+        body = self.buf
+        del body[self.pos:]
+        self.buf, self.pos = _acquire_buffer(self.part_size), 0
+
+        # Blocks only until any one in-flight part finishes, so a slow part never holds up the pipeline and at most `max_workers` parts are held in memory.
+        self.slots.acquire()
+        future = self.executor.submit(client.upload_part, Bucket=uri_obj.bucket, Key=uri_obj.key, UploadId=self.upload_id, PartNumber=len(self.futures) + 1, Body=body, **part_args)
+        future.add_done_callback(lambda _: self._part_done(body))
+        self.futures.append(future)
+    #end def
+
+    def _part_done(self, body):
+        self.slots.release()
+        if len(body) == self.part_size: _release_buffer(body)
+    #end def
+
+    def close(self):
+        if self.closed: return
+
+        uri_obj = self.uri_obj
+        client = uri_obj._get_client()
+
+        try:
+            if self.aborted:
+                if self.upload_id is not None:
+                    self.executor.shutdown(wait=True)
+                    client.abort_multipart_upload(Bucket=uri_obj.bucket, Key=uri_obj.key, UploadId=self.upload_id)
+                #end if
+            elif self.upload_id is None and self.pos <= self.threshold: uri_obj.put_content(self.buf)
+            else:
+                if self.pos: self._upload_part()
+                parts = [dict(ETag=future.result()['ETag'], PartNumber=i + 1) for i, future in enumerate(self.futures)]
+                client.complete_multipart_upload(Bucket=uri_obj.bucket, Key=uri_obj.key, UploadId=self.upload_id, MultipartUpload=dict(Parts=parts))
+                uri_obj._set_head_cached(False)
+            #end if
+        except Exception:
+            if self.upload_id is not None:
+                self.executor.shutdown(wait=True)
+                client.abort_multipart_upload(Bucket=uri_obj.bucket, Key=uri_obj.key, UploadId=self.upload_id)
+            #end if
+            raise
+        finally:
+            if self.executor is not None: self.executor.shutdown(wait=True)
+            if self.buf is not None and len(self.buf) == self.part_size: _release_buffer(self.buf)
+            self.buf = None
+            super(_S3MultipartOutput, self).close()
+        #end try
+    #end def
+
+    @property
+    def name(self):
+        return str(self.uri_obj)
 #end class
 
 
@@ -347,71 +1296,130 @@ class GoogleCloudStorageURI(BaseURI):
     SUPPORTED_SCHEMES = set(['gs', 'gcs'])
     """Supported schemes for :class:`GoogleCloudStorageURI`."""
 
-    VALID_STORAGE_ARGS = ['chunk_size', 'encryption_key']
+    VALID_STORAGE_ARGS = frozenset(['chunk_size', 'encryption_key'])
     """Storage arguments allowed to pass to :mod:`google.cloud.storage.client` methods."""
 
+    RESUMABLE_THRESHOLD = 8 * 1024 * 1024
+    """Size above which :meth:`open_upload_stream` switches from a single upload request to a resumable upload."""
+
     gs_client = None
 
+    gs_buckets = weakref.WeakValueDictionary()
+    """Bucket objects shared by all URIs in the same bucket."""
+
     @classmethod
-    def parse_uri(cls, uri, storage_args={}):
+    def parse_uri(cls, uri, storage_args=None):
         if uri.scheme not in cls.SUPPORTED_SCHEMES: return None
-        if gcloud_storage is None: raise ImportError('You need to install google-cloud-storage package to handle {} URIs.'.format(uri.scheme))
+        _import_gcloud_storage(uri.scheme)
 
-        if cls.gs_client is None: cls.gs_client = gcloud_storage.Client()
+        cls._get_client()
 
         return GoogleCloudStorageURI(uri.netloc, uri.path.lstrip('/'), storage_args=storage_args)
     #end def
 
-    def __init__(self, bucket, key, storage_args={}):
+    @classmethod
+    def _get_client(cls):
+        """Returns :attr:`gs_client`, (re)creating it if it was never created or was dropped after a fork."""
+
+        if cls.gs_client is None: cls.gs_client = _get_gs_client()
+        return cls.gs_client
+    #end def
+
+    def __init__(self, bucket, key, storage_args=None):
         """
         :param str bucket: Bucket name
         :param str key: Key to file
         :param dict storage_args: Keyword arguments that are passed to :mod:`google.cloud.storage.client`
         """
 
+        if storage_args is None: storage_args = {}
+
         self.content_type = storage_args.get('content_type', 'application/octet-stream')
         self.content_encoding = storage_args.get('content_encoding', None)
-        self.metadata = storage_args.get('metadata', {})
+        self.metadata = dict(storage_args.get('metadata', {}))
         self.metadata.update(storage_args.get('Metadata', {}))
 
         super(GoogleCloudStorageURI, self).__init__(storage_args=storage_args)
 
-        self.blob = self.gs_client.bucket(bucket).blob(key, **self.storage_args)
+        client = self._get_client()
+        bucket_key = (id(client), bucket)
+        bucket_obj = self.gs_buckets.get(bucket_key)
+        if bucket_obj is None: bucket_obj = self.gs_buckets[bucket_key] = client.bucket(bucket)
+
+        self.blob = bucket_obj.blob(key, **self.storage_args)
+        self._set_blob_properties()
+    #end def
+
+    def _set_blob_properties(self):
+        """Sets the properties that are uploaded with the content on :attr:`blob`, once rather than before every upload."""
+
+        self.blob.content_encoding = self.content_encoding
+        self.blob.metadata = self.metadata
     #end def
 
     def get_content(self):
         return self.blob.download_as_string()
 
+    def open_stream(self):
+        """Reads the content in chunks of ``chunk_size`` (see :meth:`google.cloud.storage.blob.Blob.open`); requires google-cloud-storage 1.38+."""
+
+        if not hasattr(self.blob, 'open'): raise NotImplementedError('`open_stream` requires google-cloud-storage 1.38+.')
+        return _StreamingInput(self.blob.open('rb'), str(self))
+    #end def
+
     def put_content(self, content):
         """
         The default content type is set to ``application/octet-stream`` and content encoding set to ``None``.
         """
 
-        self.blob.content_encoding = self.content_encoding
-        self.blob.metadata = self.metadata
-        return self.blob.upload_from_string(content, content_type=self.content_type)
+        self._set_head_cached(False)
+        return self.blob.upload_from_string(_as_bytes(content), content_type=self.content_type)
+
+    def open_upload_stream(self):
+        """
+        Content up to :attr:`RESUMABLE_THRESHOLD` is uploaded with a single request when the stream is closed.
+        Anything larger is streamed as a resumable upload while it is being written (see :meth:`google.cloud.storage.blob.Blob.open`), which requires google-cloud-storage 1.38+.
+        """
+
+        if not hasattr(self.blob, 'open'): raise NotImplementedError('`open_upload_stream` requires google-cloud-storage 1.38+.')
+        return _GCSResumableOutput(self, threshold=self.RESUMABLE_THRESHOLD)
+    #end def
 
     def download_file(self, filename):
         self.blob.download_to_filename(filename)
 
+    def download_fileobj(self, fileobj):
+        self.blob.download_to_file(fileobj)
+
     def upload_file(self, filename):
-        self.blob.content_encoding = self.content_encoding
-        self.blob.metadata = self.metadata
+        self._set_head_cached(False)
         self.blob.upload_from_filename(filename, content_type=self.content_type)
 
     def get_metadata(self):
         """Uses ``HEAD`` requests for efficiency."""
 
         self.blob.reload()
-        return self.blob.metadata
+        self._set_head_cached()
+
+        # Reloading replaces the properties of the blob with those stored in GCS, which must not leak into later uploads.
+        metadata = self.blob.metadata
+        self._set_blob_properties()
+
+        return metadata
 
     def exists(self):
-        """Uses ``HEAD`` requests for efficiency."""
+        """Uses :meth:`google.cloud.storage.blob.Blob.exists`, which only requests the name of the object."""
 
-        try:
-            self.blob.reload()
-            return True
-        except google.cloud.exceptions.NotFound: return False
+        if self._head_cached(): return True
+
+        exists = self.blob.exists()
+        self._set_head_cached(exists)
+        return exists
+    #end def
+
+    def is_transient_error(self, e):
+        code = getattr(e, 'code', None)  # HTTP status of :class:`google.api_core.exceptions.GoogleAPICallError`
+        return (isinstance(code, int) and (code >= 500 or code == 429)) or super(GoogleCloudStorageURI, self).is_transient_error(e)
     #end def
 
     def dir_exists(self): return True
@@ -438,6 +1446,66 @@ class GoogleCloudStorageURI(BaseURI):
 #end class
 
 
+class _GCSResumableOutput(BufferedIOBase):
+    """A writable stream that buffers small content for a single upload request, and switches to a resumable upload of the blob once the content grows beyond ``threshold``."""
+
+    def __init__(self, uri_obj, threshold):
+        super(_GCSResumableOutput, self).__init__()
+
+        self.uri_obj = uri_obj
+        self.threshold = threshold
+        self.buf = BytesIO()
+        self.writer = None
+        self.aborted = False
+    #end def
+
+    def abort(self):
+        """Discards the content written so far, so that closing the stream (explicitly or when it is garbage collected) does not upload anything."""
+
+        self.aborted = True
+        self.close()
+    #end def
+
+    def writable(self): return True
+
+    def write(self, b):
+        if self.closed: raise ValueError('I/O operation on closed file.')
+        if self.writer is not None: return self.writer.write(b)
+
+        n = self.buf.write(b)
+        if self.buf.tell() > self.threshold:
+            # `flush` is called by wrapping text and gzip streams, and must not finalize the upload.
+            self.uri_obj._set_head_cached(False)
+            self.writer = self.uri_obj.blob.open('wb', ignore_flush=True, content_type=self.uri_obj.content_type)
+            self.writer.write(self.buf.getbuffer())
+            self.buf = None
+        #end if
+
+        return n
+    #end def
+
+    def close(self):
+        if self.closed: return
+
+        try:
+            if self.aborted:
+                # A blob writer only finalizes the resumable upload on close while its buffer is open, so closing the buffer leaves the upload incomplete.
+                buffer = getattr(self.writer, '_buffer', None)
+                if buffer is not None: buffer.close()
+            elif self.writer is None: self.uri_obj.put_content(self.buf.getvalue())
+            else: self.writer.close()
+        finally:
+            self.buf = None
+            super(_GCSResumableOutput, self).close()
+        #end try
+    #end def
+
+    @property
+    def name(self):
+        return str(self.uri_obj)
+#end class
+
+
 class HTTPURI(BaseURI):
     """
     Storage system for HTTP/HTTPS.
@@ -446,20 +1514,21 @@ class HTTPURI(BaseURI):
     SUPPORTED_SCHEMES = set(['http', 'https'])
     """Supported schemes for :class:`HTTPURI`."""
 
-    VALID_STORAGE_ARGS = ['params', 'headers', 'cookies', 'auth', 'timeout', 'allow_redirects', 'proxies', 'verify', 'stream', 'cert', 'method']
+    VALID_STORAGE_ARGS = frozenset(['params', 'headers', 'cookies', 'auth', 'timeout', 'allow_redirects', 'proxies', 'verify', 'stream', 'cert', 'method'])
     """Keyword arguments passed to :func:`requests.request`."""
 
-    @classmethod
-    def parse_uri(cls, uri, storage_args={}):
-        global requests
+    DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+    """Size of the chunks in which downloaded content is written to file."""
 
+    @classmethod
+    def parse_uri(cls, uri, storage_args=None):
         if uri.scheme not in cls.SUPPORTED_SCHEMES: return None
-        if requests is None: raise ImportError('You need to install requests package to handle {} URIs.'.format(uri.scheme))
+        _import_requests(uri.scheme)
 
         return HTTPURI(uri.geturl(), storage_args=storage_args)
     #end def
 
-    def __init__(self, url, raise_for_status=True, method=None, storage_args={}):
+    def __init__(self, url, raise_for_status=True, method=None, storage_args=None):
         """
         :param str uri: HTTP URI.
         :param str raise_for_status: Raises a :exc:`requests.RequestException` when the response status code is not 2xx (i.e., calls :meth:`requests.Request.raise_for_status`)
@@ -471,14 +1540,30 @@ class HTTPURI(BaseURI):
         self.url = url
         self.method = self.storage_args.pop('method', method)
         self.raise_for_status = self.storage_args.pop('raise_for_status', raise_for_status)
+
+        # Downloads are streamed unless the caller says otherwise; their keyword arguments are only composed once, instead of on every request.
+        self._download_kwargs = dict(self.storage_args)
+        self._download_kwargs.setdefault('stream', True)
     #end def
 
     def get_content(self):
-        r = requests.request(self.method if self.method else 'GET', self.url, **self.storage_args)
+        r = _get_http_session().request(self.method if self.method else 'GET', self.url, **self.storage_args)
         if self.raise_for_status: r.raise_for_status()
         return r.content
     #end def
 
+    def open_stream(self):
+        """Reads the body of the response as it arrives, unless streaming is disabled with the ``stream`` storage argument."""
+
+        if not self._download_kwargs['stream']: raise NotImplementedError('`open_stream` is not available when `stream` is disabled.')
+
+        r = _get_http_session().request(self.method if self.method else 'GET', self.url, **self._download_kwargs)
+        if self.raise_for_status: r.raise_for_status()
+        r.raw.decode_content = True  # same as `iter_content`, e.g., for `Content-Encoding: gzip`
+
+        return _StreamingInput(r.raw, str(self))
+    #end def
+
     def put_content(self, content):
         """
         Makes a ``PUT`` request with the content in the body.
@@ -486,33 +1571,73 @@ class HTTPURI(BaseURI):
         :raise: An :exc:`requests.RequestException` if it is not 2xx.
         """
 
-        r = requests.request(self.method if self.method else 'PUT', self.url, data=content, **self.storage_args)
+        self._set_head_cached(False)
+        r = _get_http_session().request(self.method if self.method else 'PUT', self.url, data=_as_bytes(content), **self.storage_args)
         if self.raise_for_status: r.raise_for_status()
     #end def
 
     def download_file(self, filename):
-        kwargs = self.storage_args.copy()
-        stream = kwargs.pop('stream', True)
-        r = requests.request(self.method if self.method else 'GET', self.url, stream=stream, **kwargs)
+        with open(filename, 'wb') as f:
+            self.download_fileobj(f)
+    #end def
+
+    def download_fileobj(self, fileobj):
+        r = _get_http_session().request(self.method if self.method else 'GET', self.url, **self._download_kwargs)
+        if self.raise_for_status: r.raise_for_status()
+        for chunk in r.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+            fileobj.write(chunk)
+    #end def
+
+    def download_file_if_modified(self, filename, etag=None):
+        """Makes a conditional request using ``If-None-Match``."""
+
+        kwargs = self._download_kwargs
+        if etag: kwargs = dict(kwargs, headers=dict(kwargs.get('headers') or {}, **{'If-None-Match': etag}))
+
+        r = _get_http_session().request(self.method if self.method else 'GET', self.url, **kwargs)
+        if r.status_code == 304: return False, etag
         if self.raise_for_status: r.raise_for_status()
         with open(filename, 'wb') as f:
-            for chunk in r.iter_content(chunk_size=1024):
+            for chunk in r.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
                 f.write(chunk)
+
+        return True, r.headers.get('ETag')
     #end def
 
     def upload_file(self, filename):
+        """
+        Streams the file as the body of a ``PUT`` request, with its ``Content-Length`` taken from the file system so that it is never read into memory.
+        The body is a file object rather than a generator, so that it can be rewound when the request is retried.
+        """
+
+        self._set_head_cached(False)
+        kwargs = self.storage_args.copy()
         with open(filename, 'rb') as f:
-            r = requests.request(self.method if self.method else 'PUT', self.url, data=f, **self.storage_args)
+            kwargs['headers'] = dict(kwargs.get('headers') or {}, **{'Content-Length': str(os.fstat(f.fileno()).st_size)})
+            r = _get_http_session().request(self.method if self.method else 'PUT', self.url, data=f, **kwargs)
+        #end with
         if self.raise_for_status: r.raise_for_status()
     #end def
 
     def exists(self):
+        if self._head_cached(): return True
+
         try:
-            requests.head(self.url).raise_for_status()
+            _get_http_session().head(self.url).raise_for_status()
+            self._set_head_cached()
             return True
         except requests.HTTPError: return False
     #end def
 
+    def is_transient_error(self, e):
+        if isinstance(e, requests.HTTPError):
+            status = getattr(e.response, 'status_code', None) or 0
+            return status >= 500 or status == 429
+        #end if
+
+        return isinstance(e, (requests.ConnectionError, requests.Timeout)) or super(HTTPURI, self).is_transient_error(e)
+    #end def
+
     def dir_exists(self):
         """
         Makes a ``HEAD`` requests to the URI.
@@ -520,7 +1645,7 @@ class HTTPURI(BaseURI):
         :returns: ``True`` if status code is 2xx.
         """
 
-        r = requests.request(self.method if self.method else 'HEAD', self.url, **self.storage_args)
+        r = _get_http_session().request(self.method if self.method else 'HEAD', self.url, **self.storage_args)
         try: r.raise_for_status()
         except Exception: return False
 
@@ -543,22 +1668,45 @@ class SNSURI(BaseURI):
     SUPPORTED_SCHEMES = set(['sns'])
     """Supported schemes for :class:`SNSURI`."""
 
-    VALID_STORAGE_ARGS = ['Subject', 'MessageAttributes', 'MessageStructure']
+    VALID_STORAGE_ARGS = frozenset(['Subject', 'MessageAttributes', 'MessageStructure'])
     """Keyword arguments passed to :meth:`SNS.Client.publish`."""
 
+    PUBLISH_BATCH_SIZE = 10
+    """Maximum number of messages that SNS accepts in a single ``PublishBatch`` request."""
+
+    PUBLISH_BATCH_BYTES = 256 * 1024
+    """Maximum total size (in bytes) of the messages (and their attributes) that SNS accepts in a single ``PublishBatch`` request."""
+
     sns_resource = None
+    sns_client = None
 
     @classmethod
-    def parse_uri(cls, uri, storage_args={}):
+    def parse_uri(cls, uri, storage_args=None):
         if uri.scheme not in cls.SUPPORTED_SCHEMES: return None
-        if boto3 is None: raise ImportError('You need to install boto3 package to handle {} URIs.'.format(uri.scheme))
+        _import_boto3(uri.scheme)
 
-        if cls.sns_resource is None: cls.sns_resource = boto3.resource('sns')
+        cls._get_client()
 
         return SNSURI(uri.netloc, uri.path, storage_args=storage_args)
     #end def
 
-    def __init__(self, topic_name, region, storage_args={}):
+    @classmethod
+    def _get_resource(cls):
+        """Returns :attr:`sns_resource`, (re)creating it if it was never created or was dropped after a fork."""
+
+        if cls.sns_resource is None: cls.sns_resource = _get_boto3_resource('sns')
+        return cls.sns_resource
+    #end def
+
+    @classmethod
+    def _get_client(cls):
+        """Returns :attr:`sns_client`, the thread-safe low-level client of :attr:`sns_resource`, (re)creating it if it was never created or was dropped after a fork."""
+
+        if cls.sns_client is None: cls.sns_client = cls._get_resource().meta.client
+        return cls.sns_client
+    #end def
+
+    def __init__(self, topic_name, region, storage_args=None):
         """
         :param str topic_name: Name of SNS topic for publishing; it can be either an ARN or just the topic name (thus defaulting to the current role's account)
         :param str region: AWS region of SNS topic (defaults to current role's region)
@@ -569,15 +1717,16 @@ class SNSURI(BaseURI):
 
         region = region.lstrip('/')
         if not region:
-            region = boto3.session.Session().region_name
+            region = _get_aws_region()
 
+        # Messages are published with the shared low-level client, which unlike resource objects is thread-safe.
         topic = None
 
         if topic_name.startswith('arn:'):
-            topic = self.sns_resource.Topic(topic_name)
+            topic = self._get_resource().Topic(topic_name)
         else:
-            account_id = boto3.client('sts').get_caller_identity().get('Account')
-            topic = self.sns_resource.Topic('arn:aws:sns:{}:{}:{}'.format(region, account_id, topic_name))
+            account_id = _get_aws_account_id()
+            topic = self._get_resource().Topic('arn:aws:sns:{}:{}:{}'.format(region, account_id, topic_name))
         #end if
 
         self.topic = topic
@@ -596,9 +1745,44 @@ class SNSURI(BaseURI):
         :param bytes content: raw bytes content to publish, will decode to ``UTF-8`` if string is detected
         """
         if not isinstance(content, str):
-            content = content.decode('utf-8')
+            content = _as_bytes(content).decode('utf-8')
+
+        self._get_client().publish(TopicArn=self.topic.arn, Message=content, **self.storage_args)
+    #end def
+
+    def put_content_batch(self, contents):
+        """
+        Publishes multiple messages to SNS, in batches of up to :attr:`PUBLISH_BATCH_SIZE` messages and :attr:`PUBLISH_BATCH_BYTES` bytes per request.
+
+        :param list contents: raw bytes contents to publish (see :meth:`put_content`)
+        :raise: An :exc:`IOError` if any message in a batch failed to publish.
+        """
+
+        client = self._get_client()
+        contents = [content if isinstance(content, str) else _as_bytes(content).decode('utf-8') for content in contents]
+
+        # The storage arguments (subject and message attributes) count towards the size of every message they are sent with.
+        args_size = sum(len(str(v).encode('utf-8')) for v in self.storage_args.values())
+
+        batch, batch_size = [], 0
+        for content in contents:
+            size = len(content.encode('utf-8')) + args_size
+            if batch and (len(batch) == self.PUBLISH_BATCH_SIZE or batch_size + size > self.PUBLISH_BATCH_BYTES):
+                self._publish_batch(client, batch)
+                batch, batch_size = [], 0
+            #end if
+
+            batch.append(content)
+            batch_size += size
+        #end for
 
-        self.topic.publish(Message=content, **self.storage_args)
+        if batch: self._publish_batch(client, batch)
+    #end def
+
+    def _publish_batch(self, client, contents):
+        entries = [dict(Id=str(j), Message=content, **self.storage_args) for j, content in enumerate(contents)]
+        r = client.publish_batch(TopicArn=self.topic.arn, PublishBatchRequestEntries=entries)
+        if r.get('Failed'): raise IOError('Failed to publish {} of {} messages to {}: {}'.format(len(r['Failed']), len(entries), self, r['Failed'][0].get('Message')))
     #end def
 
     def download_file(self, filename):
@@ -609,7 +1793,7 @@ class SNSURI(BaseURI):
 
     def upload_file(self, filename):
         with open(filename, 'rb') as f:
-            self.topic.publish(Message=f.read(), **self.storage_args)
+            self._get_client().publish(TopicArn=self.topic.arn, Message=f.read(), **self.storage_args)
     #end def
 
     def exists(self):
@@ -631,3 +1815,33 @@ class SNSURI(BaseURI):
 
 
 STORAGES = [FileURI, S3URI, GoogleCloudStorageURI, HTTPURI, SNSURI]
+
+
+def _reset_clients():
+    """
+    Drops the clients inherited from the parent process after a fork, as their connections (and locks) cannot be shared with the child.
+    Locks that may have been held by other threads of the parent at the time of the fork are replaced as well.
+    Storage objects created before the fork get the new clients, except for :class:`GoogleCloudStorageURI` objects, whose blobs keep referring to the client of the parent; they should be created again in the child.
+    """
+
+    global _CLIENTS_LOCK, _IMPORT_LOCK
+
+    _IMPORT_LOCK = threading.Lock()
+    _BUFFER_POOLS.clear()
+
+    cached = set(id(client) for client in _CLIENTS.values())
+    cached.update(id(client.meta.client) for client in _CLIENTS.values() if hasattr(getattr(client, 'meta', None), 'client'))  # low-level clients of boto3 resources
+    _CLIENTS.clear()
+    _CLIENTS_LOCK = threading.Lock()
+
+    for storage, attr in [(S3URI, 's3_resource'), (S3URI, 's3_client'), (GoogleCloudStorageURI, 'gs_client'), (SNSURI, 'sns_resource'), (SNSURI, 'sns_client')]:
+        if id(getattr(storage, attr)) in cached: setattr(storage, attr, None)
+
+    GoogleCloudStorageURI.gs_buckets.clear()  # bound to the dropped client
+#end def
+
+
+if hasattr(os, 'register_at_fork'): os.register_at_fork(after_in_child=_reset_clients)  # Python 3.7+
+
+_SCHEME_MAP = {scheme: storage for storage in STORAGES for scheme in storage.SUPPORTED_SCHEMES}
+"""Maps each URI scheme to the storage system in :data:`STORAGES` that supports it."""
@@ -6,50 +6,90 @@ It also provides convenience functions for quick one liners and :mod:`argparse`
 * `Argument parser types <#uriutils.uriutils.URIFileType>`_
 """
 
-__all__ = ['uri_open', 'uri_read', 'uri_dump', 'uri_exists', 'uri_exists_wait', 'get_uri_metadata', 'get_uri_obj', 'URIFileType', 'URIType', 'URIDirType']
+__all__ = ['uri_open', 'uri_read', 'uri_iter_chunks', 'uri_dump', 'uri_read_many', 'uri_dump_many', 'uri_exists', 'uri_exists_many', 'uri_exists_wait', 'get_uri_metadata', 'get_uri_obj', 'URIFileType', 'URIType', 'URIDirType']
 
-# from contextlib import contextmanager
-import atexit
-import gzip
-from io import BytesIO, TextIOWrapper, FileIO
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+from io import BufferedReader, BytesIO, StringIO, TextIOWrapper, FileIO
 import logging
 import os
-from tempfile import NamedTemporaryFile
+import random
+import re
 import time
+import zlib
 
-try: from urlparse import urlparse  # Python 2
-except ImportError: from urllib.parse import urlparse  # Python 3
+try: from urlparse import ParseResult  # Python 2
+except ImportError: from urllib.parse import ParseResult  # Python 3
 
-from .storages import STORAGES, URIBytesOutput, BaseURI
+from .storages import STORAGES, URIBytesOutput, BaseURI, FileURI, _SCHEME_MAP, _urlparse
 
 logger = logging.getLogger(__name__)
 
+_IO_POOL = None
 
-def get_uri_obj(uri, storage_args={}):
+_GzipURIFile = None
+
+_ARGPARSE_FILES = None
+
+_NON_PATH_CHARS = re.compile('[?#;\t\r\n]')
+
+_DEFAULT_TEXTIO_ARGS = {'encoding': 'utf-8'}
+
+_STRINGIO_TEXTIO_ARGS = frozenset(['encoding', 'errors', 'newline'])
+"""Keyword arguments of :class:`io.TextIOWrapper` that :class:`_NamedStringIO` can honor when decoding content all at once."""
+
+_MODES = {'rb': (True, True), 'r': (True, False), 'w': (False, False), 'wb': (False, True)}
+"""Maps each mode supported by :func:`uri_open` to whether it is a read mode and a binary mode."""
+
+
+def _is_local_path(uri):
+    """Returns ``True`` if :func:`urlparse` would parse ``uri`` into nothing but a local path (i.e., no scheme, netloc, params, query or fragment), so that it can be used as is."""
+
+    if not uri or uri[0] <= ' ' or uri[-1] <= ' ' or uri.startswith('//'): return False  # stripped or parsed as a netloc
+    if not uri.startswith('/') and ':' in uri: return False  # may have a scheme
+
+    return _NON_PATH_CHARS.search(uri) is None
+#end def
+
+
+def _is_gzip_uri(uri):
+    """Same as ``os.path.splitext(uri)[1].lower() == '.gz'``, but only compares the last characters of ``uri`` unless it does look like a gzip file."""
+
+    return uri[-3:].lower() == '.gz' and os.path.splitext(uri)[1].lower() == '.gz'
+#end def
+
+
+def get_uri_obj(uri, storage_args=None):
     """
     Retrieve the underlying storage object based on the URI (i.e., scheme).
 
-    :param str uri: URI to get storage object for
+    :param str uri: URI to get storage object for; an already parsed :class:`urllib.parse.ParseResult` is also accepted
     :param dict storage_args: Keyword arguments to pass to the underlying storage object
     """
 
     if isinstance(uri, BaseURI): return uri
+    if not isinstance(uri, ParseResult) and _is_local_path(uri): return FileURI(uri, storage_args=storage_args)  # skips parsing plain paths
     uri_obj = None
 
-    o = urlparse(uri)
-    for storage in STORAGES:
+    o = uri if isinstance(uri, ParseResult) else _urlparse(uri)
+    storage = _SCHEME_MAP.get(o.scheme)
+    if storage is not None:
         uri_obj = storage.parse_uri(o, storage_args=storage_args)
-        if uri_obj is not None:
-            break
-    #end for
+    else:  # storages added to STORAGES after import
+        for storage in STORAGES:
+            uri_obj = storage.parse_uri(o, storage_args=storage_args)
+            if uri_obj is not None:
+                break
+        #end for
+    #end if
     if uri_obj is None:
-        raise TypeError('<{}> is an unsupported URI.'.format(uri))
+        raise TypeError('<{}> is an unsupported URI.'.format(o.geturl()))
 
     return uri_obj
 #end def
 
 
-def uri_open(uri, mode='rb', auto_compress=True, in_memory=True, delete_tempfile=True, textio_args={}, storage_args={}):
+def uri_open(uri, mode='rb', auto_compress=True, in_memory=True, delete_tempfile=True, textio_args=None, storage_args=None, io_chunksize=1024 * 1024, cache_dir=None, size_hint=None, stream=False):
     """
     Opens a URI for reading / writing.
     Analogous to the :func:`open` function.
@@ -61,50 +101,94 @@ def uri_open(uri, mode='rb', auto_compress=True, in_memory=True, delete_tempfile
     :param str uri: URI of file to open
     :param str mode: Either ``rb``, ``r``, ``w``, or ``wb`` for read/write modes in binary/text respectiely
     :param bool auto_compress: Whether to automatically use the :mod:`gzip` module with ``.gz`` URIsF
-    :param bool in_memory: Whether to store entire file in memory or in a local temporary file
-    :param bool delete_tempfile: When :attr:`in_memory` is ``False``, whether to delete the temporary file on close
+    :param bool in_memory: Whether to store entire file in memory or in a local temporary file; local files are read directly, and writes to storages that support streaming uploads are uploaded incrementally instead
+    :param bool delete_tempfile: When :attr:`in_memory` is ``False``, whether to delete the temporary file on close; writes to storages that support streaming uploads do not use a temporary file, so this is ignored and ``temp_name`` is ``None``
     :param dict textio_args: Keyword arguments to pass to :class:`io.TextIOWrapper` for text read/write mode
     :param dict storage_args: Keyword arguments to pass to the underlying storage object
+    :param int io_chunksize: Size (in bytes) of the read buffer used when streaming or reading from a temporary file; larger reads spend less time in per-call overhead
+    :param str cache_dir: Directory to cache remote content in when reading; cached copies are revalidated using ETags (see :func:`_cached_download`). Defaults to the ``URIUTILS_CACHE_DIR`` environment variable, and caching is disabled if neither is set.
+    :param int size_hint: Expected size (in bytes) of the content written when :attr:`in_memory` is ``True``, which storages that cannot stream uploads allocate upfront (see :class:`~uriutils.storages.URIBytesOutput`)
+    :param bool stream: When reading with :attr:`in_memory`, whether to read the content incrementally from storages that support streaming (see :meth:`~uriutils.storages.BaseURI.open_stream`) instead of reading all of it into memory first; the returned file object is then not seekable
 
     :returns: file-like object to URI
     """
 
     if isinstance(uri, BaseURI): uri = str(uri)
+    elif isinstance(uri, ParseResult): uri = uri.geturl()
     uri_obj = get_uri_obj(uri, storage_args)
 
-    if mode == 'rb': read_mode, binary_mode = True, True
-    elif mode == 'r': read_mode, binary_mode = True, False
-    elif mode == 'w': read_mode, binary_mode = False, False
-    elif mode == 'wb': read_mode, binary_mode = False, True
-    else: raise TypeError('`mode` cannot be "{}".'.format(mode))
+    try: read_mode, binary_mode = _MODES[mode]
+    except KeyError: raise TypeError('`mode` cannot be "{}".'.format(mode))
+
+    if cache_dir is None: cache_dir = os.environ.get('URIUTILS_CACHE_DIR')
 
     if read_mode:
-        if in_memory:
-            file_obj = BytesIO(uri_obj.get_content())
-            setattr(file_obj, 'name', str(uri_obj))
+        if cache_dir and not isinstance(uri_obj, FileURI):
+            cache_path = _cached_download(uri_obj, cache_dir)
+            cache_file_obj = FileIO(cache_path, 'rb')
+            cache_file_obj.name = str(uri_obj)
+            file_obj = BufferedReader(cache_file_obj, buffer_size=io_chunksize)
+            setattr(file_obj, 'temp_name', cache_path)
+        elif in_memory:
+            # Remote streams cannot seek (as zipfile, tarfile, etc. need to), so they are only used when asked for.
+            file_obj = None
+            if stream or uri_obj.SEEKABLE_STREAMS:
+                try: file_obj = BufferedReader(uri_obj.open_stream(), buffer_size=io_chunksize)
+                except NotImplementedError: pass
+            #end if
+
+            if file_obj is None:
+                content = uri_obj.get_content()
+
+                # Text that is already entirely in memory is decoded in one go, rather than through the buffer and incremental decoder of a TextIOWrapper.
+                if not binary_mode and not (auto_compress and _is_gzip_uri(uri)) and (textio_args is None or _STRINGIO_TEXTIO_ARGS.issuperset(textio_args)):
+                    return _NamedStringIO(content, name=str(uri_obj), **(textio_args or {}))
+
+                file_obj = _NamedBytesIO(content, name=str(uri_obj))
+            #end if
         else:
-            file_obj = _TemporaryURIFileIO(uri_obj=uri_obj, input_mode=True, delete_tempfile=delete_tempfile)
+            temp_file_obj = _TemporaryURIFileIO(uri_obj=uri_obj, input_mode=True, delete_tempfile=delete_tempfile)
+            file_obj = BufferedReader(temp_file_obj, buffer_size=io_chunksize)
+            setattr(file_obj, 'temp_name', temp_file_obj.temp_name)
         #end if
     else:
-        if in_memory: file_obj = URIBytesOutput(uri_obj)
+        if in_memory:
+            try: file_obj = uri_obj.open_upload_stream()
+            except NotImplementedError: file_obj = URIBytesOutput(uri_obj, size_hint=size_hint)
         else:
-            file_obj = _TemporaryURIFileIO(uri_obj=uri_obj, input_mode=False, pre_close_action=uri_obj.upload_file, delete_tempfile=delete_tempfile)
-            setattr(file_obj, 'name', str(uri_obj))
+            # Streaming uploads avoid writing the content to a temporary file and reading it back to upload it.
+            try: file_obj = uri_obj.open_upload_stream()
+            except NotImplementedError:
+                file_obj = _TemporaryURIFileIO(uri_obj=uri_obj, input_mode=False, pre_close_action=uri_obj.upload_file, delete_tempfile=delete_tempfile)
+                setattr(file_obj, 'name', str(uri_obj))
+            #end try
         #end if
     #end if
 
     temp_name = getattr(file_obj, 'temp_name', None)
+    raw_file_obj = file_obj
 
-    if auto_compress:
-        _, ext = os.path.splitext(uri)
-        ext = ext.lower()
-        if ext == '.gz': file_obj = gzip.GzipFile(fileobj=file_obj, mode='rb' if read_mode else 'wb')
-    #end if
+    try:
+        if auto_compress and _is_gzip_uri(uri): file_obj = _get_gzip_file_type()(fileobj=file_obj, mode='rb' if read_mode else 'wb')
 
-    if not binary_mode:
-        textio_args.setdefault('encoding', 'utf-8')
-        file_obj = TextIOWrapper(file_obj, **textio_args)
-    #end if
+        if not binary_mode:
+            if textio_args is None: textio_args = _DEFAULT_TEXTIO_ARGS
+            elif 'encoding' not in textio_args: textio_args = dict(textio_args, encoding='utf-8')
+
+            file_obj = TextIOWrapper(file_obj, **textio_args)
+        #end if
+    except BaseException:
+        # Output files upload their content when closed, including when they are garbage collected, so they are discarded instead.
+        if read_mode: file_obj.close()
+        else:
+            getattr(raw_file_obj, 'abort', raw_file_obj.close)()
+            if file_obj is not raw_file_obj:
+                try: file_obj.close()  # the gzip wrapper, which can no longer write its trailer
+                except (IOError, ValueError): pass
+            #end if
+        #end if
+        raise
+    #end try
 
     if not hasattr(file_obj, 'temp_name'): setattr(file_obj, 'temp_name', temp_name)
 
@@ -112,6 +196,82 @@ def uri_open(uri, mode='rb', auto_compress=True, in_memory=True, delete_tempfile
 #end def
 
 
+def _cached_download(uri_obj, cache_dir):
+    """
+    Returns the path to a local copy of the content of ``uri_obj`` in ``cache_dir``, downloading it only if it is missing or has changed.
+    Cached copies are revalidated using their ETag once they are older than ``URIUTILS_CACHE_TTL`` seconds (default 0, i.e., on every read).
+    Least recently used copies are evicted once the cache grows beyond ``URIUTILS_CACHE_MAX_BYTES`` (default 1 GiB).
+    Copies are keyed by the URI together with its storage arguments, as these may select different content (e.g., HTTP ``params`` or S3 ``VersionId``).
+    """
+
+    import json
+
+    try: os.makedirs(cache_dir)
+    except OSError:
+        if not os.path.isdir(cache_dir): raise
+    #end try
+
+    key = json.dumps([str(uri_obj), uri_obj.storage_args], sort_keys=True, default=repr)
+    path = os.path.join(cache_dir, hashlib.sha256(key.encode('utf-8')).hexdigest())
+    etag_path = path + '.etag'
+
+    etag = None
+    if os.path.exists(path) and os.path.exists(etag_path):
+        if time.time() - os.path.getmtime(etag_path) < float(os.environ.get('URIUTILS_CACHE_TTL', '0')):
+            os.utime(path, None)
+            return path
+        #end if
+
+        with open(etag_path, 'r') as f:
+            etag = f.read().strip() or None
+    #end if
+
+    from tempfile import mkstemp
+
+    fd, temp_name = mkstemp(dir=cache_dir, suffix='.tmp')
+    os.close(fd)
+    try:
+        modified, etag = uri_obj.download_file_if_modified(temp_name, etag)
+        if modified: getattr(os, 'replace', os.rename)(temp_name, path)
+    finally:
+        if os.path.exists(temp_name): os.remove(temp_name)
+    #end try
+
+    with open(etag_path, 'w') as f:
+        f.write(etag or '')
+    os.utime(path, None)
+
+    _evict_cache(cache_dir, int(os.environ.get('URIUTILS_CACHE_MAX_BYTES', str(1024 ** 3))), keep=path)
+
+    return path
+#end def
+
+
+def _evict_cache(cache_dir, max_bytes, keep=None):
+    """Removes the least recently used files in ``cache_dir`` (and their ETags) until it is no larger than ``max_bytes``; ``keep`` is never removed."""
+
+    entries = []
+    for fname in os.listdir(cache_dir):
+        if fname.endswith('.etag') or fname.endswith('.tmp'): continue
+        path = os.path.join(cache_dir, fname)
+        st = os.stat(path)
+        entries.append((st.st_mtime, st.st_size, path))
+    #end for
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes: break
+        if path == keep: continue
+
+        for p in (path, path + '.etag'):
+            try: os.remove(p)
+            except OSError: pass
+        #end for
+        total -= size
+    #end for
+#end def
+
+
 def uri_read(*args, **kwargs):
     """
     Reads the contents of a URI into a string or bytestring.
@@ -127,6 +287,53 @@ def uri_read(*args, **kwargs):
 #end def
 
 
+def uri_iter_chunks(uri, chunk_size=1024 * 1024, auto_compress=True, **kwargs):
+    """
+    Iterates over the binary contents of a URI in chunks, without holding all of it in memory.
+    Gzip files are decompressed incrementally (including files of several concatenated gzip members, such as appended logs), and no decompressed chunk is larger than ``chunk_size``.
+    See :func:`uri_open` for complete description of keyword parameters.
+
+    :param str uri: URI to read
+    :param int chunk_size: Maximum size (in bytes) of each chunk that is read or decompressed
+    :param bool auto_compress: Whether to automatically decompress ``.gz`` URIs
+    :returns: a generator over chunks of the contents
+    """
+
+    decompress = auto_compress and _is_gzip_uri(str(uri))
+    kwargs.setdefault('stream', True)
+
+    with uri_open(uri, mode='rb', auto_compress=False, **kwargs) as f:
+        reads = iter(lambda: f.read(chunk_size), b'')
+        if not decompress:
+            for data in reads: yield data
+            return
+        #end if
+
+        d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        started = False
+        for data in reads:
+            started = True
+            while True:
+                if d.eof:  # a new member follows, after optional zero padding
+                    data = data.lstrip(b'\0')
+                    if not data: break
+                    d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                #end if
+
+                chunk = d.decompress(data, chunk_size)
+                if chunk: yield chunk
+
+                # A full chunk may leave more output pending in the decompressor even after all input is consumed.
+                data = d.unused_data if d.eof else d.unconsumed_tail
+                if not data and (d.eof or len(chunk) < chunk_size): break
+            #end while
+        #end for
+
+        if started and not d.eof: raise EOFError('Compressed file ended before the end-of-stream marker was reached.')
+    #end with
+#end def
+
+
 def uri_dump(uri, content, mode='wb', **kwargs):
     """
     Dumps the contents of a string/bytestring into a URI.
@@ -139,14 +346,77 @@ def uri_dump(uri, content, mode='wb', **kwargs):
 
     if 'r' in mode: raise ValueError('Read mode is not allowed for `uri_dump`.')
 
+    if mode == 'wb' and kwargs.get('in_memory', True):
+        uri_obj = get_uri_obj(uri, kwargs.get('storage_args'))
+        if not kwargs.get('auto_compress', True) or not _is_gzip_uri(str(uri_obj)):
+            # Binary content is handed to the storage as is, instead of being copied into (and back out of) an in-memory file object.
+            uri_obj.put_content(content)
+            return
+        #end if
+    #end if
+
     with uri_open(uri, mode=mode, **kwargs) as f:
         f.write(content)
-        f.flush()
     #end with
 #end def
 
 
-def get_uri_metadata(uri, storage_args={}):
+def _get_io_pool():
+    """Returns the thread pool shared by the bulk functions; its size is set by the ``URIUTILS_WORKERS`` environment variable (default 16)."""
+
+    global _IO_POOL
+
+    if _IO_POOL is None: _IO_POOL = ThreadPoolExecutor(max_workers=int(os.environ.get('URIUTILS_WORKERS', '16')))
+
+    return _IO_POOL
+#end def
+
+
+def _reset_io_pool():
+    """Drops the thread pool inherited from the parent process after a fork, as its worker threads do not exist in the child."""
+
+    global _IO_POOL
+
+    _IO_POOL = None
+#end def
+
+
+if hasattr(os, 'register_at_fork'): os.register_at_fork(after_in_child=_reset_io_pool)  # Python 3.7+
+
+
+def uri_read_many(uris, **kwargs):
+    """
+    Reads the contents of many URIs concurrently.
+    Reads are network-bound and release the GIL, so they are spread over a shared thread pool whose size is set by the ``URIUTILS_WORKERS`` environment variable (default 16).
+    See :func:`uri_open` for complete description of keyword parameters.
+
+    :param list uris: URIs to read
+    :returns: a generator over ``(uri, content)`` tuples, in order of completion
+    """
+
+    pool = _get_io_pool()
+    futures = {pool.submit(uri_read, uri, **kwargs): uri for uri in uris}
+    for future in as_completed(futures):
+        yield futures[future], future.result()
+#end def
+
+
+def uri_dump_many(items, mode='wb', **kwargs):
+    """
+    Dumps contents into many URIs concurrently, using the same thread pool as :func:`uri_read_many`.
+    See :func:`uri_dump` for complete description of keyword parameters.
+
+    :param list items: ``(uri, content)`` tuples to dump
+    :param str mode: Either ``w``, or ``wb`` to write binary/text content respectiely
+    """
+
+    pool = _get_io_pool()
+    futures = [pool.submit(uri_dump, uri, content, mode=mode, **kwargs) for uri, content in items]
+    for future in as_completed(futures): future.result()
+#end def
+
+
+def get_uri_metadata(uri, storage_args=None):
     """
     Get the "metadata" from URI.
     This is most commonly used with bucket storage on the Cloud such as S3 and Google Cloud.
@@ -162,7 +432,7 @@ def get_uri_metadata(uri, storage_args={}):
 #end def
 
 
-def uri_exists(uri, storage_args={}):
+def uri_exists(uri, storage_args=None):
     """
     Check if URI exists.
 
@@ -177,28 +447,75 @@ def uri_exists(uri, storage_args={}):
 #end def
 
 
-def uri_exists_wait(uri, timeout=300, interval=5, storage_args={}):
+def uri_exists_many(uris, storage_args=None):
+    """
+    Checks the existence of many URIs concurrently, using the same thread pool as :func:`uri_read_many`.
+
+    :param list uris: URIs to check existence
+    :param dict storage_args: Keyword arguments to pass to the underlying storage object
+    :returns: whether each URI exists, in the same order as ``uris``
+    :rtype: list
+    """
+
+    return list(_get_io_pool().map(lambda uri: uri_exists(uri, storage_args=storage_args), uris))
+#end def
+
+
+def _missing_uri_objs(uri_objs):
+    """
+    Returns the storage objects in ``uri_objs`` that do not exist, checking them concurrently if there is more than one.
+    Objects whose check fails with a transient error (see :meth:`~uriutils.storages.BaseURI.is_transient_error`) are taken to be missing, so that they are checked again later.
+    """
+
+    def _exists(uri_obj):
+        try: return uri_obj.exists()
+        except Exception as e:
+            if not uri_obj.is_transient_error(e): raise
+            logger.debug('Transient error checking if <{}> exists: {!r}'.format(uri_obj, e))
+            return False
+        #end try
+    #end def
+
+    if len(uri_objs) == 1: return [] if _exists(uri_objs[0]) else uri_objs
+
+    exists = _get_io_pool().map(_exists, uri_objs)
+    return [uri_obj for uri_obj, e in zip(uri_objs, exists) if not e]
+#end def
+
+
+def uri_exists_wait(uri, timeout=300, interval=5, storage_args=None, max_interval=60):
     """
     Block / waits until URI exists.
+    Polling backs off exponentially with random jitter, so that long waits do not flood the storage with requests and many waiting clients do not poll in lockstep.
+    Transient errors (e.g., throttling) are treated like a missing URI, and polling keeps backing off until the timeout.
 
-    :param str uri: URI to check existence
+    :param str uri: URI to check existence (also a :class:`urllib.parse.ParseResult` or storage object); a list (or other iterable) of URIs waits until all of them exist, polling the remaining ones concurrently
     :param float timeout: Number of seconds before timing out
-    :param float interval: Calls :func:`uri_exists` every ``interval`` seconds
+    :param float interval: Initial number of seconds between calls to :func:`uri_exists`; it doubles after every attempt
     :param dict storage_args: Keyword arguments to pass to the underlying storage object
+    :param float max_interval: Maximum number of seconds between calls to :func:`uri_exists`
     :returns: ``True`` if URI exists
     :rtype: bool
     """
 
-    uri_obj = get_uri_obj(uri, storage_args)
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        if uri_obj.exists(): return True
-        time.sleep(interval)
-    #end while
+    # A :class:`ParseResult` is a tuple, so only iterables that are not URIs themselves are taken to be lists of URIs.
+    single = isinstance(uri, (ParseResult, BaseURI, type(u''), bytes)) or not hasattr(uri, '__iter__')
+    uris = [uri] if single else list(uri)
+    uri_objs = [get_uri_obj(u, storage_args) for u in uris]
+
+    # The last sleep is cut short at the deadline, where the final check is made, instead of making a redundant check after the loop.
+    deadline = time.time() + timeout
+    delay = interval
+    while True:
+        uri_objs = _missing_uri_objs(uri_objs)
+        if not uri_objs: return True
 
-    if uri_exists(uri): return True
+        remaining = deadline - time.time()
+        if remaining <= 0: return False
 
-    return False
+        time.sleep(min(delay * random.uniform(0.5, 1.5), remaining))
+        delay = min(delay * 2, max_interval)
+    #end while
 #end def
 
 
@@ -216,13 +533,32 @@ class URIFileType(object):
     #end def
 
     def __call__(self, uri):
+        global _ARGPARSE_FILES
+
+        if _ARGPARSE_FILES is None:
+            import atexit
+            import weakref
+
+            _ARGPARSE_FILES = weakref.WeakSet()
+            atexit.register(_close_argparse_files)
+        #end if
+
         f = uri_open(uri, **self.kwargs)
-        atexit.register(lambda: f.close())
+        _ARGPARSE_FILES.add(f)
+
         return f
     #end def
 #end class
 
 
+def _close_argparse_files():
+    """Closes the files opened by :class:`URIFileType` that are still alive at exit; files that were closed and garbage collected have already dropped out of the weak set."""
+
+    for f in list(_ARGPARSE_FILES):
+        if not f.closed: f.close()
+#end def
+
+
 class URIType(object):
     """
     A convenience class that can be used as the ``type`` argument to :meth:`argparse.ArgumentParser.add_argument`.
@@ -230,7 +566,7 @@ class URIType(object):
     """
 
     def __call__(self, uri):
-        o = urlparse(uri)
+        o = _urlparse(uri)
         return o
     #end def
 #end class
@@ -245,7 +581,7 @@ class URIDirType(object):
     :param dict storage_args: Keyword arguments to pass to the underlying storage object
     """
 
-    def __init__(self, create=False, storage_args={}):
+    def __init__(self, create=False, storage_args=None):
         self.create = create
         self.storage_args = storage_args
     #end def
@@ -266,13 +602,79 @@ class URIDirType(object):
 #end class
 
 
+class _NamedBytesIO(BytesIO):
+    """A :class:`io.BytesIO` with the ``name`` and ``temp_name`` attributes of the other file objects returned by :func:`uri_open`."""
+
+    __slots__ = ('name', 'temp_name')
+
+    def __init__(self, initial_bytes, name):
+        super(_NamedBytesIO, self).__init__(initial_bytes)
+        self.name = name
+        self.temp_name = None
+    #end def
+#end class
+
+
+class _NamedStringIO(StringIO):
+    """A :class:`io.StringIO` over decoded ``content``, with the ``name`` and ``temp_name`` attributes of the other file objects returned by :func:`uri_open`."""
+
+    __slots__ = ('name', 'temp_name')
+
+    def __init__(self, content, name, encoding='utf-8', errors=None, newline=None):
+        if encoding is None:
+            import locale
+            encoding = locale.getpreferredencoding(False)  # same default as TextIOWrapper
+        #end if
+
+        super(_NamedStringIO, self).__init__(content.decode(encoding, errors or 'strict'), newline=newline)
+        self.name = name
+        self.temp_name = None
+    #end def
+#end class
+
+
+def _get_gzip_file_type():
+    """
+    Returns a :class:`gzip.GzipFile` subclass that (de)compresses incrementally from/to a URI file object, and closes it when closed.
+    :class:`gzip.GzipFile` leaves the file objects passed to it open, which would otherwise defer uploading content (or removing temporary files) until they are garbage collected.
+    The :mod:`gzip` module is only imported (and the class created) on first use, so that workloads without gzip files do not pay for it.
+    """
+
+    global _GzipURIFile
+
+    if _GzipURIFile is None:
+        try: from isal import igzip as gzip  # ISA-L accelerated drop-in replacement for gzip
+        except ImportError: import gzip
+
+        class _GzipURIFile(gzip.GzipFile):
+            def close(self):
+                fileobj = self.fileobj
+                try: super(_GzipURIFile, self).close()
+                finally:
+                    if fileobj is not None: fileobj.close()
+                #end try
+            #end def
+        #end class
+    #end if
+
+    return _GzipURIFile
+#end def
+
+
 class _TemporaryURIFileIO(FileIO):
     def __init__(self, uri_obj=None, input_mode=True, pre_close_action=None, delete_tempfile=True):
-        with NamedTemporaryFile(delete=False) as f:
-            temp_name = f.name
-
-        if input_mode and uri_obj:
-            uri_obj.download_file(temp_name)
+        # For output, the new temporary file is written through its open file descriptor instead of being reopened by name.
+        from tempfile import mkstemp
+
+        fd, temp_name = mkstemp()
+        if input_mode:
+            os.close(fd)
+            try:
+                if uri_obj: uri_obj.download_file(temp_name)
+            except BaseException:
+                os.remove(temp_name)
+                raise
+            #end try
         #end if
 
         self.uri_obj = uri_obj
@@ -280,17 +682,28 @@ class _TemporaryURIFileIO(FileIO):
         self.pre_close_action = pre_close_action
         self.delete_tempfile = delete_tempfile
 
-        super(_TemporaryURIFileIO, self).__init__(temp_name, 'rb' if input_mode else 'wb')
+        super(_TemporaryURIFileIO, self).__init__(temp_name if input_mode else fd, 'rb' if input_mode else 'wb')
 
         self.name = str(self.uri_obj)  # must come after super __init__
     #end def
 
+    def abort(self):
+        """Closes and removes the temporary file without running :attr:`pre_close_action` (i.e., without uploading its content)."""
+
+        self.pre_close_action = None
+        self.delete_tempfile = True
+        self.close()
+    #end def
+
     def close(self):
         if not self.closed:
             super(_TemporaryURIFileIO, self).close()
 
-            if self.pre_close_action: self.pre_close_action(self.temp_name)
-            if self.delete_tempfile: os.remove(self.temp_name)
+            try:
+                if self.pre_close_action: self.pre_close_action(self.temp_name)
+            finally:
+                if self.delete_tempfile: os.remove(self.temp_name)
+            #end try
         #end if
     #end def
 #end class